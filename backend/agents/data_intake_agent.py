@@ -19,6 +19,7 @@ Process:
 """
 
 import os
+import re
 import tempfile
 from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
@@ -32,6 +33,7 @@ from PIL import Image
 
 # CSV/Excel Processing
 import pandas as pd
+from app.services.ocr import EXCEL_ENGINE
 
 # Image Processing
 import cv2
@@ -46,6 +48,25 @@ from app.database import get_db
 from supabase import create_client, Client
 from app.config import settings
 
+# Invoice text patterns, compiled once (run against lowercased text except dates).
+# Usage numbers only match from the start of a digit run, so a long run with no unit isn't rescanned per offset
+_KWH_RE = re.compile(r'(?<![\d.,])([\d.,]+)\s*kwh')
+_M3_RE = re.compile(r'(?<![\d.,])([\d.,]+)\s*m[³3]')
+_AMOUNT_RE = re.compile(r'total[:\s]*([\d.,]+)\s*€')
+_DATE_RE = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})')
+_INVOICE_RE = re.compile(r'factura[:\s#]*([a-z0-9-]+)')
+
+# File extension -> extractor type
+_EXT_TO_TYPE = {
+    '.pdf': 'pdf',
+    '.csv': 'csv',
+    '.xlsx': 'excel',
+    '.xls': 'excel',
+    '.jpg': 'image',
+    '.jpeg': 'image',
+    '.png': 'image'
+}
+
 
 class DataIntakeAgent:
     """Agent 1: Extract and normalize data from uploaded files"""
@@ -162,18 +183,7 @@ class DataIntakeAgent:
     def _detect_file_type(self, file_path: str, file_name: str) -> str:
         """Detect file type from extension and content"""
         ext = Path(file_name).suffix.lower()
-        
-        type_mapping = {
-            '.pdf': 'pdf',
-            '.csv': 'csv',
-            '.xlsx': 'excel',
-            '.xls': 'excel',
-            '.jpg': 'image',
-            '.jpeg': 'image',
-            '.png': 'image'
-        }
-        
-        return type_mapping.get(ext, 'unknown')
+        return _EXT_TO_TYPE.get(ext, 'unknown')
     
     async def _extract_data(self, file_path: str, file_type: str) -> Tuple[Dict, float]:
         """
@@ -261,7 +271,7 @@ class DataIntakeAgent:
     def _extract_from_excel(self, file_path: str) -> Tuple[Dict, float]:
         """Extract data from Excel file"""
         try:
-            df = pd.read_excel(file_path, sheet_name=0)
+            df = pd.read_excel(file_path, sheet_name=0, engine=EXCEL_ENGINE)
             
             # Convert to dict (first row as sample)
             data = df.iloc[0].to_dict() if len(df) > 0 else {}
@@ -334,8 +344,6 @@ class DataIntakeAgent:
         - Fine-tuned BERT model
         - GPT-4 Vision API
         """
-        import re
-        
         data = {}
         text_lower = text.lower()
         
@@ -358,8 +366,7 @@ class DataIntakeAgent:
             data['category'] = 'diesel'
         
         # Extract consumption (e.g., "1.250,5 kWh" or "1250.5 kWh")
-        kwh_pattern = r'([\d.,]+)\s*kwh'
-        kwh_match = re.search(kwh_pattern, text_lower)
+        kwh_match = _KWH_RE.search(text_lower)
         if kwh_match:
             usage_str = kwh_match.group(1).replace('.', '').replace(',', '.')
             try:
@@ -369,8 +376,7 @@ class DataIntakeAgent:
                 pass
         
         # Extract m3 for gas
-        m3_pattern = r'([\d.,]+)\s*m[³3]'
-        m3_match = re.search(m3_pattern, text_lower)
+        m3_match = _M3_RE.search(text_lower)
         if m3_match:
             usage_str = m3_match.group(1).replace('.', '').replace(',', '.')
             try:
@@ -380,8 +386,7 @@ class DataIntakeAgent:
                 pass
         
         # Extract total amount (e.g., "Total: 185,75 €")
-        amount_pattern = r'total[:\s]*([\d.,]+)\s*€'
-        amount_match = re.search(amount_pattern, text_lower)
+        amount_match = _AMOUNT_RE.search(text_lower)
         if amount_match:
             amount_str = amount_match.group(1).replace('.', '').replace(',', '.')
             try:
@@ -391,8 +396,7 @@ class DataIntakeAgent:
                 pass
         
         # Extract dates (e.g., "01/09/2025" or "September 2025")
-        date_pattern = r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})'
-        dates = re.findall(date_pattern, text)
+        dates = _DATE_RE.findall(text)
         if dates:
             # Assume first date is period_start
             day, month, year = dates[0]
@@ -404,8 +408,7 @@ class DataIntakeAgent:
                 data['period_end'] = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
         
         # Extract invoice number
-        invoice_pattern = r'factura[:\s#]*([a-z0-9-]+)'
-        invoice_match = re.search(invoice_pattern, text_lower)
+        invoice_match = _INVOICE_RE.search(text_lower)
         if invoice_match:
             data['invoice_number'] = invoice_match.group(1).upper()
         
@@ -24,6 +24,8 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_SERVICE_KEY: str
+    DB_POOL_SIZE: int = 5  # Connections kept open per process
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed under burst load
     
     # JWT
     JWT_SECRET: str
@@ -54,6 +56,9 @@ class Settings(BaseSettings):
     # Natural Gas Conversion
     NATURAL_GAS_M3_TO_KWH: float = 11.63
     
+    # Document Parsing
+    OCR_DEBUG: bool = True  # Attach extraction logs to parsed records (shown on the dashboard)
+    
     # File Upload
     MAX_FILE_SIZE_MB: int = 50
     ALLOWED_EXTENSIONS: str = "pdf,csv,xlsx,xls,txt,jpg,png"
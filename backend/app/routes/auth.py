@@ -61,8 +61,8 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
     email_sent = False
     email_error = None
     try:
-        from app.services.email import SENDER_EMAIL
-        import resend
+        from app.services.email import SENDER_EMAIL, get_resend
+        resend = get_resend()
         logger.info(f"Email config check - Sender: {SENDER_EMAIL}, API Key set: {bool(resend.api_key)}")
         
         result = EmailService.send_welcome_email(
@@ -172,8 +172,6 @@ async def test_welcome_email(email: str, company: str = "Test Company"):
     """
     Test the full welcome email template
     """
-    import resend
-    
     logger.info(f"🧪 Testing full welcome email template to {email}")
     
     try:
@@ -204,8 +202,8 @@ async def test_email_real(email: str):
     """
     Test sending to a real email address
     """
-    import resend
-    from app.services.email import SENDER_EMAIL
+    from app.services.email import SENDER_EMAIL, get_resend
+    resend = get_resend()
     
     logger.info(f"🧪 Testing email to real address: {email}")
     
@@ -241,8 +239,9 @@ async def test_email():
     """
     Test endpoint to verify email configuration
     """
-    import resend
+    from app.services.email import get_resend
     from app.config import settings
+    resend = get_resend()
     
     logger.info("🧪 Testing email configuration...")
     
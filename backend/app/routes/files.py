@@ -2,6 +2,7 @@
 File upload and processing routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from supabase import create_client, Client
 from datetime import datetime
@@ -100,7 +101,8 @@ async def upload_file(
         
         try:
             # Parse document - now returns List[UploadRecord]
-            parsed_records: List[UploadRecord] = DocumentParser.parse_document(tmp_path, file_ext)
+            # Parsing is CPU-bound, run it off the event loop so other requests keep being served
+            parsed_records: List[UploadRecord] = await run_in_threadpool(DocumentParser.parse_document, tmp_path, file_ext)
             
             # Handle single record vs multiple records
             if len(parsed_records) == 1:
@@ -20,6 +20,9 @@ from app.models.schemas import TokenData
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Character set for generated passwords
+_PASSWORD_ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*"
+
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
@@ -43,8 +46,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def generate_random_password(length: int = 16) -> str:
     """Generate a secure random password"""
-    alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
-    password = ''.join(secrets.choice(alphabet) for _ in range(length))
+    password = ''.join(secrets.choice(_PASSWORD_ALPHABET) for _ in range(length))
     return password
 
 
@@ -1,36 +1,61 @@
 """
 Email service using Resend API
 """
-import resend
+import re
 import logging
+from functools import lru_cache
+from html import escape
 from typing import Dict, Optional, List
 from app.config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Configure Resend
-try:
-    resend.api_key = settings.RESEND_API_KEY
-    if not resend.api_key or resend.api_key == "":
-        logger.error("❌ RESEND_API_KEY is empty or not set!")
-    else:
-        logger.info(f"✅ Resend API key configured: {resend.api_key[:10]}...")
-except Exception as e:
-    logger.exception(f"❌ Failed to configure Resend API: {e}")
+# Resend SDK, imported and configured on first send to keep worker boot light
+_resend = None
+
+
+def get_resend():
+    """Import and configure the Resend SDK on first use"""
+    global _resend
+    if _resend is None:
+        import resend
+        try:
+            resend.api_key = settings.RESEND_API_KEY
+            if not resend.api_key or resend.api_key == "":
+                logger.error("❌ RESEND_API_KEY is empty or not set!")
+            else:
+                logger.info("✅ Resend API key configured: %s...", resend.api_key[:10])
+        except Exception:
+            logger.exception("❌ Failed to configure Resend API")
+        _resend = resend
+    return _resend
 
-# Sender email - Using Resend verified test email
 # Sender email
 SENDER_EMAIL = "Luma ESG <hello@getluma.es>"
 
+# Links derived from settings, resolved once instead of on every send
+_LOGIN_URL = f"{settings.FRONTEND_URL}/login"
+_DASHBOARD_URL = f"{settings.FRONTEND_URL}/dashboard"
+_FORM_URL = settings.GOOGLE_FORM_URL
 
-class EmailService:
-    """Service for sending transactional emails via Resend"""
-    
-    @staticmethod
-    def _get_base_template(language: str = "en") -> str:
-        """Get base HTML template for emails"""
-        return """
+# HTML-escape dynamic fields; company names repeat across a customer's emails
+_esc = lru_cache(maxsize=1024)(escape)
+
+# HTML templates are minified once at import so each send posts a smaller body
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_LINE_BREAK_RE = re.compile(r"\s*\n\s*")
+
+
+def _minify_html(html: str) -> str:
+    """Strip comments and line-break indentation from an HTML template"""
+    html = _HTML_COMMENT_RE.sub("", html)
+    html = _CSS_COMMENT_RE.sub("", html)
+    return _LINE_BREAK_RE.sub("", html).strip()
+
+
+_BASE_TEMPLATE = _minify_html("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -215,42 +240,10 @@ class EmailService:
     </div>
 </body>
 </html>
-        """
-    
-    @staticmethod
-    def send_welcome_email(to_email: str, company_name: str, language: str = "en") -> Dict:
-        """
-        Send welcome email with Google Form link for verification
-        
-        Args:
-            to_email: Recipient email address
-            company_name: Name of the company
-            language: Email language ('en' or 'es')
-        
-        Returns:
-            Response from Resend API
-        """
-        if language == "es":
-            subject = f"Bienvenido a Luma – Confirma la información de {company_name}"
-            greeting = f"Hola equipo de {company_name},"
-            intro = "Gracias por tu interés en unirte a Luma, la plataforma de automatización ESG para empresas españolas."
-            instruction = "Por favor, completa el siguiente formulario para confirmar la información de tu empresa y los detalles de contacto CSRD."
-            verification_text = "Una vez verificado, recibirás tus credenciales de acceso al panel de control."
-            button_text = "Completar Formulario"
-            closing = "Equipo Luma"
-        else:
-            subject = f"Welcome to Luma – Confirm {company_name}'s Information"
-            greeting = f"Hello {company_name} team,"
-            intro = "Thank you for your interest in joining Luma, the ESG automation platform for Spanish companies."
-            instruction = "Please fill out the form below to confirm your company information and CSRD contact details."
-            verification_text = "Once verified, you'll receive your login credentials for the dashboard."
-            button_text = "Complete Form"
-            closing = "Luma Team"
-        
-        # Get the Google Form URL
-        form_url = settings.GOOGLE_FORM_URL
-        
-        content = f"""
+""")
+
+_CONTENT_TMPLS = {
+    "welcome": _minify_html("""
 <div class="header">
     <h1>Luma</h1>
     <p>Bring clarity to sustainability</p>
@@ -283,24 +276,155 @@ class EmailService:
     
     <p style="margin-top: 24px;">Best regards,<br><strong>The Luma Team</strong></p>
 </div>
+"""),
+    "credentials": _minify_html("""
+<div class="header">
+    <h1>Luma</h1>
+    <p>Bring clarity to sustainability</p>
+</div>
+<div class="content">
+    <h2 style="color: #111827; font-size: 24px; margin-bottom: 20px;">Your Luma Dashboard Access is Ready 🎉</h2>
+    
+    <p><strong>{greeting}</strong></p>
+    <p>{approved}</p>
+    
+    <div class="credentials">
+        <h3 style="margin: 0 0 16px 0; color: #059669;">{credentials_title}</h3>
+        <p><strong>{login_label}</strong> {user_email}</p>
+        <p><strong>{password_label}</strong> <code style="background: #e5e7eb; padding: 4px 8px; border-radius: 4px; font-size: 14px;">{password}</code></p>
+    </div>
+    
+    <div class="button-container">
+        <a href="{login_url}" class="button">{login_text}</a>
+    </div>
+    
+    <div class="info-box">
+        <p><strong>🔒 Security note:</strong> {security_note}</p>
+    </div>
+    
+    <p style="margin-top: 24px;">{closing}<br><strong>The Luma Team</strong></p>
+</div>
+"""),
+    "report_ready": _minify_html("""
+<div class="header">
+    <h1>Luma</h1>
+    <p>Bring clarity to sustainability</p>
+</div>
+<div class="content">
+    <h2 style="color: #111827; font-size: 24px; margin-bottom: 20px;">Your Sustainability Report is Ready 📊</h2>
+    
+    <p><strong>{greeting}</strong></p>
+    <p>{ready}</p>
+    
+    <div class="info-box">
+        <h3>CSRD Coverage</h3>
+        <p style="font-size: 32px; font-weight: 700; color: #10b981; margin: 12px 0;">{coverage:.0f}%</p>
+    </div>
+    
+    <div class="button-container">
+        <a href="{report_url}" class="button">{download_text}</a>
+        <a href="{dashboard_url}" class="button" style="background: #059669; margin-left: 10px;">{dashboard_text}</a>
+    </div>
+    
+    <p style="margin-top: 24px;">Best regards,<br><strong>The Luma Team</strong></p>
+</div>
+"""),
+}
+
+# Each content fragment is composed into the base layout once, so a send is a single format call
+_EMAIL_TMPLS = {
+    name: _BASE_TEMPLATE.replace("{content}", content)
+    for name, content in _CONTENT_TMPLS.items()
+}
+
+# Localized strings per sender, keyed by language ("en" is the fallback)
+_WELCOME_STRINGS = {
+    "es": {
+        "subject_fmt": "Bienvenido a Luma – Confirma la información de {0}",
+    },
+    "en": {
+        "subject_fmt": "Welcome to Luma – Confirm {0}'s Information",
+    },
+}
+
+_CREDENTIALS_STRINGS = {
+    "es": {
+        "subject": "Tu Acceso al Panel de Luma está Listo 🎉",
+        "greeting_fmt": "Hola equipo de {0},",
+        "approved": "¡Buenas noticias! Tu empresa ha sido aprobada para acceder a Luma.",
+        "credentials_title": "Credenciales de Acceso:",
+        "login_label": "Email:",
+        "password_label": "Contraseña:",
+        "login_text": "Inicia sesión aquí",
+        "security_note": "Por favor, cambia tu contraseña después del primer inicio de sesión.",
+        "closing": "¡Bienvenido a bordo!",
+    },
+    "en": {
+        "subject": "Your Luma Dashboard Access is Ready 🎉",
+        "greeting_fmt": "Hello {0} team,",
+        "approved": "Great news! Your company has been approved for Luma access.",
+        "credentials_title": "Login Credentials:",
+        "login_label": "Email:",
+        "password_label": "Password:",
+        "login_text": "Login Here",
+        "security_note": "Please change your password after first login.",
+        "closing": "Welcome aboard!",
+    },
+}
+
+_REPORT_READY_STRINGS = {
+    "es": {
+        "subject": "Tu Informe de Sostenibilidad Luma está Listo 📊",
+        "greeting_fmt": "Hola equipo de {0},",
+        "ready": "Tu informe de sostenibilidad mensual ha sido generado con éxito.",
+        "download_text": "Descargar Informe",
+        "dashboard_text": "Ver Panel de Control",
+    },
+    "en": {
+        "subject": "Your Luma Sustainability Report is Ready 📊",
+        "greeting_fmt": "Hello {0} team,",
+        "ready": "Your monthly sustainability report has been successfully generated.",
+        "download_text": "Download Report",
+        "dashboard_text": "View Dashboard",
+    },
+}
+
+
+class EmailService:
+    """Service for sending transactional emails via Resend"""
+    
+    @staticmethod
+    def send_welcome_email(to_email: str, company_name: str, language: str = "en") -> Dict:
         """
+        Send welcome email with Google Form link for verification
         
-        html_body = EmailService._get_base_template().format(content=content)
+        Args:
+            to_email: Recipient email address
+            company_name: Name of the company
+            language: Email language ('en' or 'es')
         
-        logger.info(f"Attempting to send welcome email to {to_email} for company {company_name}")
-        logger.debug(f"Email details - From: {SENDER_EMAIL}, Subject: {subject}")
+        Returns:
+            Response from Resend API
+        """
+        strings = _WELCOME_STRINGS.get(language, _WELCOME_STRINGS["en"])
+        subject = strings["subject_fmt"].format(company_name)
+        
+        html_body = _EMAIL_TMPLS["welcome"].format(company_name=_esc(company_name), form_url=_FORM_URL)
+        
+        logger.info("Attempting to send welcome email to %s for company %s", to_email, company_name)
+        logger.debug("Email details - From: %s, Subject: %s", SENDER_EMAIL, subject)
         
         try:
-            response = resend.Emails.send({
+            response = get_resend().Emails.send({
                 "from": SENDER_EMAIL,
                 "to": to_email,
                 "subject": subject,
                 "html": html_body,
             })
-            logger.info(f"Successfully sent welcome email to {to_email}. Response: {response}")
+            logger.info("Successfully sent welcome email to %s. Response: %s", to_email, response)
             return response
-        except Exception as e:
-            logger.exception(f"Failed to send welcome email to {to_email}: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send welcome email to %s", to_email)
             raise
     
     @staticmethod
@@ -324,59 +448,18 @@ class EmailService:
         Returns:
             Response from Resend API
         """
-        if language == "es":
-            subject = "Tu Acceso al Panel de Luma está Listo 🎉"
-            greeting = f"Hola equipo de {company_name},"
-            approved = f"¡Buenas noticias! Tu empresa ha sido aprobada para acceder a Luma."
-            credentials_title = "Credenciales de Acceso:"
-            login_label = "Email:"
-            password_label = "Contraseña:"
-            login_text = "Inicia sesión aquí"
-            security_note = "Por favor, cambia tu contraseña después del primer inicio de sesión."
-            closing = "¡Bienvenido a bordo!"
-        else:
-            subject = "Your Luma Dashboard Access is Ready 🎉"
-            greeting = f"Hello {company_name} team,"
-            approved = f"Great news! Your company has been approved for Luma access."
-            credentials_title = "Login Credentials:"
-            login_label = "Email:"
-            password_label = "Password:"
-            login_text = "Login Here"
-            security_note = "Please change your password after first login."
-            closing = "Welcome aboard!"
+        strings = _CREDENTIALS_STRINGS.get(language, _CREDENTIALS_STRINGS["en"])
+        subject = strings["subject"]
         
-        content = f"""
-<div class="header">
-    <h1>Luma</h1>
-    <p>Bring clarity to sustainability</p>
-</div>
-<div class="content">
-    <h2 style="color: #111827; font-size: 24px; margin-bottom: 20px;">Your Luma Dashboard Access is Ready 🎉</h2>
-    
-    <p><strong>{greeting}</strong></p>
-    <p>{approved}</p>
-    
-    <div class="credentials">
-        <h3 style="margin: 0 0 16px 0; color: #059669;">{credentials_title}</h3>
-        <p><strong>{login_label}</strong> {user_email}</p>
-        <p><strong>{password_label}</strong> <code style="background: #e5e7eb; padding: 4px 8px; border-radius: 4px; font-size: 14px;">{password}</code></p>
-    </div>
-    
-    <div class="button-container">
-        <a href="{settings.FRONTEND_URL}/login" class="button">{login_text}</a>
-    </div>
-    
-    <div class="info-box">
-        <p><strong>🔒 Security note:</strong> {security_note}</p>
-    </div>
-    
-    <p style="margin-top: 24px;">{closing}<br><strong>The Luma Team</strong></p>
-</div>
-        """
+        html_body = _EMAIL_TMPLS["credentials"].format(
+            greeting=strings["greeting_fmt"].format(_esc(company_name)),
+            user_email=_esc(user_email),
+            password=escape(password),  # not cached: keep plaintext out of the LRU
+            login_url=_LOGIN_URL,
+            **strings
+        )
         
-        html_body = EmailService._get_base_template().format(content=content)
-        
-        return resend.Emails.send({
+        return get_resend().Emails.send({
             "from": SENDER_EMAIL,
             "to": to_email,
             "subject": subject,
@@ -404,49 +487,18 @@ class EmailService:
         Returns:
             Response from Resend API
         """
-        if language == "es":
-            subject = f"Tu Informe de Sostenibilidad Luma está Listo 📊"
-            greeting = f"Hola equipo de {company_name},"
-            ready = "Tu informe de sostenibilidad mensual ha sido generado con éxito."
-            coverage_text = f"Cobertura CSRD: <strong>{coverage:.0f}%</strong>"
-            download_text = "Descargar Informe"
-            dashboard_text = "Ver Panel de Control"
-        else:
-            subject = f"Your Luma Sustainability Report is Ready 📊"
-            greeting = f"Hello {company_name} team,"
-            ready = "Your monthly sustainability report has been successfully generated."
-            coverage_text = f"CSRD Coverage: <strong>{coverage:.0f}%</strong>"
-            download_text = "Download Report"
-            dashboard_text = "View Dashboard"
-        
-        content = f"""
-<div class="header">
-    <h1>Luma</h1>
-    <p>Bring clarity to sustainability</p>
-</div>
-<div class="content">
-    <h2 style="color: #111827; font-size: 24px; margin-bottom: 20px;">Your Sustainability Report is Ready 📊</h2>
-    
-    <p><strong>{greeting}</strong></p>
-    <p>{ready}</p>
-    
-    <div class="info-box">
-        <h3>CSRD Coverage</h3>
-        <p style="font-size: 32px; font-weight: 700; color: #10b981; margin: 12px 0;">{coverage:.0f}%</p>
-    </div>
-    
-    <div class="button-container">
-        <a href="{report_url}" class="button">{download_text}</a>
-        <a href="{settings.FRONTEND_URL}/dashboard" class="button" style="background: #059669; margin-left: 10px;">{dashboard_text}</a>
-    </div>
-    
-    <p style="margin-top: 24px;">Best regards,<br><strong>The Luma Team</strong></p>
-</div>
-        """
+        strings = _REPORT_READY_STRINGS.get(language, _REPORT_READY_STRINGS["en"])
+        subject = strings["subject"]
         
-        html_body = EmailService._get_base_template().format(content=content)
+        html_body = _EMAIL_TMPLS["report_ready"].format(
+            greeting=strings["greeting_fmt"].format(_esc(company_name)),
+            coverage=coverage,
+            report_url=_esc(report_url),
+            dashboard_url=_DASHBOARD_URL,
+            **strings
+        )
         
-        return resend.Emails.send({
+        return get_resend().Emails.send({
             "from": SENDER_EMAIL,
             "to": to_email,
             "subject": subject,
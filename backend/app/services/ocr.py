@@ -11,11 +11,19 @@ try:
 except ImportError:
     HAS_PANDAS = False
     pd = None  # Define pd as None if not available
+try:
+    import python_calamine  # noqa: F401  Rust xlsx reader, much faster than openpyxl
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None  # Let pandas pick openpyxl
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Tuple, TYPE_CHECKING
 from pathlib import Path
 import hashlib
 import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 
 if TYPE_CHECKING:
     import pandas as pd
@@ -24,6 +32,171 @@ from app.config import settings
 from app.models.schemas import UploadRecord, DocumentCategory
 
 
+# Parsed records keyed by (text hash, supplier or "txt") so re-uploads skip parsing
+_RECORD_CACHE_SIZE = 256
+_record_cache: "OrderedDict[Tuple[str, Optional[str]], UploadRecord]" = OrderedDict()
+_record_cache_lock = threading.Lock()
+# PDF file digest -> record cache key, so byte-identical re-uploads skip text extraction too
+_pdf_file_keys: "OrderedDict[str, Tuple[str, Optional[str]]]" = OrderedDict()
+# PyMuPDF does not support multithreading; uploads are parsed in worker threads
+_fitz_lock = threading.Lock()
+
+# Formats accepted by parse_spanish_date, tried in order
+_DATE_FORMATS = (
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%Y-%m-%d",  # ISO format
+    "%d/%m/%y",
+    "%d-%m-%y",
+)
+
+# Characters dropped from amounts before parsing (spaces and the euro sign)
+_NUMBER_STRIP_TABLE = str.maketrans('', '', ' €')
+
+# Known suppliers and their keywords, in detection priority order
+_SUPPLIER_KEYWORDS = {
+    "Iberdrola": ["iberdrola"],
+    "Endesa": ["endesa"],
+    "Naturgy": ["naturgy", "gas natural"],
+    "EDP": ["edp"],
+    "Repsol": ["repsol"],
+    "Cepsa": ["cepsa"],
+    "Galp": ["galp"],
+    "Shell": ["shell"],
+    "BP": ["bp"],
+    "DHL": ["dhl"],
+    "SEUR": ["seur"],
+    "MRW": ["mrw"]
+}
+
+# Invoice patterns are compiled once at import, grouped per parser.
+# Leading number runs carry a (?<![...]) guard so matching only starts where a run
+# starts; otherwise a long digit table with no unit is rescanned from every offset.
+# Keyword-then-number patterns bound their gap to 80 chars of the same line for the
+# same reason: an unbounded .*? retries the number run from every position in it
+_IBERDROLA_PATTERNS = {
+    "invoice": re.compile(r'Factura\s*n[ºo]:?\s*([A-Z0-9\-\/\.]+)', re.IGNORECASE),
+    "issue_date": re.compile(r'Fecha de emisi[óo]n:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})', re.IGNORECASE),
+    "period": re.compile(
+        r'Periodo de facturaci[óo]n:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})\s*[-–]\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})',
+        re.IGNORECASE
+    ),
+    "usage": re.compile(r'Consumo(?:\s*total)?:?\s*([\d\.\,]+)\s*(kWh)', re.IGNORECASE),
+    "emission_factor": re.compile(r'Factor de emisi[óo]n:?\s*([\d\.\,]+)\s*kg\s*CO2\/kWh', re.IGNORECASE),
+    "amount": re.compile(r'Importe total[^\n]{0,80}?:\s*([\d\.\,]+)\s*€', re.IGNORECASE),
+    "vat": re.compile(r'IVA\s*(\d{1,2})%', re.IGNORECASE),
+}
+
+_ENDESA_PATTERNS = {
+    "usage": re.compile(r'kWh facturados:?\s*([\d\.\,]+)\s*kWh', re.IGNORECASE),
+    "issue_date": re.compile(r'Fecha emisi[óo]n:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})', re.IGNORECASE),
+    "period": re.compile(
+        r'Periodo:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})\s*[-–]\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})',
+        re.IGNORECASE
+    ),
+    "amount": re.compile(r'Total factura:?\s*([\d\.\,]+)\s*€', re.IGNORECASE),
+    "emission_factor": re.compile(r'(?<![\d\.\,])([\d\.\,]+)\s*kg\s*CO2\/kWh', re.IGNORECASE),
+}
+
+_NATURGY_PATTERNS = {
+    "usage": re.compile(r'Consumo[^\n]{0,80}?:?\s*([\d\.\,]+)\s*(m3|kWh)', re.IGNORECASE),
+    "pcs": re.compile(r'PCS[^\n]{0,80}?([\d\.\,]+)\s*kWh/m3', re.IGNORECASE),
+    "emission_factor": re.compile(r'(?<![\d\.\,])([\d\.\,]+)\s*kg\s*CO2\/kWh', re.IGNORECASE),
+    "issue_date": re.compile(r'Fecha.*?emisi[óo]n:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})', re.IGNORECASE),
+    "period": re.compile(
+        r'Periodo.*?:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})\s*[-–]\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})',
+        re.IGNORECASE
+    ),
+    "amount": re.compile(r'Total[^\n]{0,80}?:?\s*([\d\.\,]+)\s*€', re.IGNORECASE),
+}
+
+_FUEL_PATTERNS = {
+    "usage": re.compile(r'(?<![\d\.\,])([\d\.\,]+)\s*(Litros|L)\b', re.IGNORECASE),
+    "diesel": re.compile(r'gas[óo]leo|diesel|di[ée]sel', re.IGNORECASE),
+    "gasoline": re.compile(r'gasolina|gasoline|95|98', re.IGNORECASE),
+    "issue_date": re.compile(r'Fecha:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})', re.IGNORECASE),
+    "amount": re.compile(r'Total[^\n]{0,80}?:?\s*([\d\.\,]+)\s*€', re.IGNORECASE),
+}
+
+_GENERIC_PATTERNS = {
+    "invoice": (
+        re.compile(r'Invoice\s*Number:?\s*([A-Z0-9\-\/\.]+)', re.IGNORECASE),
+        re.compile(r'N[ºo]\s*Factura:?\s*([A-Z0-9\-\/\.]+)', re.IGNORECASE),
+        re.compile(r'Factura:?\s*([A-Z0-9\-\/\.]+)', re.IGNORECASE),
+    ),
+    "date": (
+        re.compile(r'Date:?\s*(\d{1,2}[\s\/\-]\w+[\s\/\-]\d{4})', re.IGNORECASE),  # 15 de Enero 2025
+        re.compile(r'Fecha:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})', re.IGNORECASE),
+        re.compile(r'(\d{2}[\/\-]\d{2}[\/\-]\d{4})', re.IGNORECASE),
+    ),
+    "period": re.compile(
+        r'Per[ií]odo:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})\s*[-–]\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})',
+        re.IGNORECASE
+    ),
+    "is_electricity": re.compile(r'electric|kWh|energ[ií]a', re.IGNORECASE),
+    "is_gas": re.compile(r'gas|m³|m3', re.IGNORECASE),
+    "is_fuel": re.compile(r'diesel|gasolina|combustible|litros?|L\b', re.IGNORECASE),
+    "is_freight": re.compile(r'transport|freight|env[ií]o|distancia|km', re.IGNORECASE),
+    "kwh_usage": (
+        re.compile(r'(?<![\d\s\.\,])([\d\s\.\,]+)\s*kWh', re.IGNORECASE),
+        re.compile(r'Consumo[^\n]{0,80}?:?\s*([\d\s\.\,]+)\s*kWh', re.IGNORECASE),
+        re.compile(r'Energy\s*Consumption:?\s*([\d\s\.\,]+)\s*kWh', re.IGNORECASE),
+        re.compile(r'energ[ií]a\s*activa[^\n]{0,80}?:?\s*([\d\s\.\,]+)\s*kWh', re.IGNORECASE),
+    ),
+    "m3_usage": (
+        re.compile(r'(?<![\d\s\.\,])([\d\s\.\,]+)\s*m[³3]', re.IGNORECASE),
+        re.compile(r'Consumo[^\n]{0,80}?:?\s*([\d\s\.\,]+)\s*m[³3]', re.IGNORECASE),
+        re.compile(r'Volume:?\s*([\d\s\.\,]+)\s*m[³3]', re.IGNORECASE),
+    ),
+    "liters_usage": (
+        re.compile(r'(?<![\d\s\.\,])([\d\s\.\,]+)\s*(Litros|L)\b', re.IGNORECASE),
+        re.compile(r'Volume:?\s*([\d\s\.\,]+)\s*L', re.IGNORECASE),
+        re.compile(r'Cantidad:?\s*([\d\s\.\,]+)\s*Litros', re.IGNORECASE),
+    ),
+    "diesel": re.compile(r'diesel', re.IGNORECASE),
+    "distance": (
+        re.compile(r'(?<![\d\.\,])([\d\.\,]+)\s*km', re.IGNORECASE),
+        re.compile(r'Distance:?\s*([\d\.\,]+)\s*km', re.IGNORECASE),
+        re.compile(r'Distancia:?\s*([\d\.\,]+)\s*km', re.IGNORECASE),
+    ),
+    "weight": (
+        re.compile(r'(?<![\d\.\,])([\d\.\,]+)\s*kg', re.IGNORECASE),
+        re.compile(r'Weight:?\s*([\d\.\,]+)\s*kg', re.IGNORECASE),
+        re.compile(r'Peso:?\s*([\d\.\,]+)\s*kg', re.IGNORECASE),
+    ),
+    "amount": (
+        re.compile(r'Total:?\s*([\d\.\,]+)\s*EUR', re.IGNORECASE),
+        re.compile(r'Importe:?\s*([\d\.\,]+)\s*€', re.IGNORECASE),
+        re.compile(r'(?<![\d\.\,])([\d\.\,]+)\s*EUR', re.IGNORECASE),
+        re.compile(r'(?<![\d\.\,])([\d\.\,]+)\s*€', re.IGNORECASE),
+    ),
+}
+# Case-sensitive twins of the keyword/unit patterns, run against text.lower().
+# Only literal letters are lowered, escapes such as \s and \d are kept as is
+_PATTERN_LITERAL_RE = re.compile(r'(\\.)|[A-Z]+')
+_GENERIC_LOWERED = {
+    pattern: re.compile(
+        _PATTERN_LITERAL_RE.sub(lambda m: m.group(1) or m.group(0).lower(), pattern.pattern),
+        pattern.flags & ~re.IGNORECASE
+    )
+    for key in (
+        "is_electricity", "is_gas", "is_fuel", "is_freight", "diesel",
+        "kwh_usage", "m3_usage", "liters_usage", "distance", "weight", "amount"
+    )
+    for pattern in (_GENERIC_PATTERNS[key] if isinstance(_GENERIC_PATTERNS[key], tuple) else (_GENERIC_PATTERNS[key],))
+}
+
+# Tabular unit -> (category, scope, emission factor, log label), first substring hit wins.
+# 'l' also covers 'litros' and 'km' covers 'tkm'
+_UNIT_RULES = (
+    ("kwh", DocumentCategory.ELECTRICITY, 2, settings.ELECTRICITY_FACTOR_KG_PER_KWH, "electricity"),
+    ("m3", DocumentCategory.NATURAL_GAS, 1, 2.016, "gas"),  # IPCC 2006: 2.016 kg CO2e per m³
+    ("l", DocumentCategory.FUEL, 1, settings.DIESEL_FACTOR_KG_PER_L, "fuel"),
+    ("km", DocumentCategory.FREIGHT, 3, settings.ROAD_FREIGHT_FACTOR_KG_PER_TKM, "freight"),
+)
+
+
 class DocumentParser:
     """Main parser orchestrator for different document types"""
     
@@ -42,19 +215,17 @@ class DocumentParser:
             return None
         
         # Remove spaces and currency symbols
-        text = text.strip().replace(' ', '').replace('€', '').replace('EUR', '')
-        
-        # Check if it has both . and ,
-        if '.' in text and ',' in text:
-            # Spanish format: thousands separator = . , decimal separator = ,
-            text = text.replace('.', '').replace(',', '.')
-        elif ',' in text:
-            # Could be decimal separator
-            # If more than 2 digits after comma, it's thousands separator
-            parts = text.split(',')
-            if len(parts[-1]) <= 2:
+        text = text.strip().translate(_NUMBER_STRIP_TABLE).replace('EUR', '')
+        
+        if ',' in text:
+            if '.' in text:
+                # Spanish format: thousands separator = . , decimal separator = ,
+                text = text.replace('.', '').replace(',', '.')
+            elif len(text) - text.rfind(',') - 1 <= 2:
+                # Could be decimal separator
                 text = text.replace(',', '.')
             else:
+                # If more than 2 digits after comma, it's thousands separator
                 text = text.replace(',', '')
         
         try:
@@ -63,6 +234,7 @@ class DocumentParser:
             return None
     
     @staticmethod
+    @lru_cache(maxsize=4096)  # datetimes are immutable, safe to share across records
     def parse_spanish_date(date_str: str) -> Optional[datetime]:
         """
         Parse Spanish date formats: DD/MM/YYYY or DD-MM-YYYY
@@ -73,17 +245,22 @@ class DocumentParser:
         # Clean the string
         date_str = date_str.strip()
         
-        # Try different formats
-        formats = [
-            "%d/%m/%Y",
-            "%d-%m-%Y",
-            "%d.%m.%Y",
-            "%Y-%m-%d",  # ISO format
-            "%d/%m/%y",
-            "%d-%m-%y"
-        ]
-        
-        for fmt in formats:
+        # Fixed-width DD/MM/YYYY and YYYY-MM-DD: slice instead of strptime
+        if len(date_str) == 10 and date_str.isascii():
+            try:
+                sep = date_str[2]
+                if sep in "/-." and date_str[5] == sep:
+                    digits = date_str[:2] + date_str[3:5] + date_str[6:]
+                    if digits.isdigit():
+                        return datetime(int(date_str[6:]), int(date_str[3:5]), int(date_str[:2]))
+                elif date_str[4] == "-" and date_str[7] == "-":
+                    digits = date_str[:4] + date_str[5:7] + date_str[8:]
+                    if digits.isdigit():
+                        return datetime(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:]))
+            except ValueError:
+                pass  # Out-of-range day/month, let strptime decide
+        
+        for fmt in _DATE_FORMATS:
             try:
                 return datetime.strptime(date_str, fmt)
             except ValueError:
@@ -98,47 +275,55 @@ class DocumentParser:
         Returns: (text, metadata)
         """
         text = ""
+        parts = []
         metadata = {"pages": 0, "method": "pymupdf"}
         
+        # Hash of raw text for deduplication, fed page by page during extraction
+        text_hash = hashlib.blake2b(digest_size=20)
+        
         try:
-            doc = fitz.open(file_path)
-            metadata["pages"] = len(doc)
-            
-            for page in doc:
-                text += page.get_text()
-            
-            doc.close()
-            
-            # Create hash of raw text for deduplication
-            metadata["raw_text_hash"] = hashlib.sha1(text.encode()).hexdigest()
+            with _fitz_lock, fitz.open(file_path) as doc:
+                metadata["pages"] = len(doc)
+                for page in doc:
+                    page_text = page.get_text("text")
+                    parts.append(page_text)
+                    text_hash.update(page_text.encode())
+            text = "".join(parts)
+            metadata["raw_text_hash"] = text_hash.hexdigest()
             
         except Exception as e:
             metadata["error"] = str(e)
+            text = "".join(parts)  # Keep the pages read before the failure
         
         return text, metadata
     
+    @staticmethod
+    def _search_anchored(pattern: re.Pattern, text: str, text_lower: str, anchor: str) -> Optional[re.Match]:
+        """
+        Same result as pattern.search(text) for a pattern that starts with a literal:
+        str.find jumps to each occurrence of the lowercase anchor and the pattern
+        is only matched at those offsets
+        """
+        if len(text_lower) != len(text) or "ı" in text or "ſ" in text:
+            # Lowercasing shifted offsets (e.g. 'İ'), or IGNORECASE folds a dotless i /
+            # long s to ASCII that lower() keeps as is: fall back to a full scan
+            return pattern.search(text)
+        
+        idx = text_lower.find(anchor)
+        while idx != -1:
+            match = pattern.match(text, idx)
+            if match:
+                return match
+            idx = text_lower.find(anchor, idx + 1)
+        return None
+    
     @staticmethod
     def detect_supplier(text: str) -> Optional[str]:
         """Detect supplier from document text"""
         text_lower = text.lower()
         
-        # Check for known suppliers
-        suppliers = {
-            "Iberdrola": ["iberdrola"],
-            "Endesa": ["endesa"],
-            "Naturgy": ["naturgy", "gas natural"],
-            "EDP": ["edp"],
-            "Repsol": ["repsol"],
-            "Cepsa": ["cepsa"],
-            "Galp": ["galp"],
-            "Shell": ["shell"],
-            "BP": ["bp"],
-            "DHL": ["dhl"],
-            "SEUR": ["seur"],
-            "MRW": ["mrw"]
-        }
-        
-        for supplier, keywords in suppliers.items():
+        # Plain substring checks use the fast C search; first supplier in priority order wins
+        for supplier, keywords in _SUPPLIER_KEYWORDS.items():
             for keyword in keywords:
                 if keyword in text_lower:
                     return supplier
@@ -167,19 +352,29 @@ class DocumentParser:
             # Treat TXT files like extracted PDF text
             with open(file_path, 'r', encoding='utf-8') as f:
                 text = f.read()
+            
+            # Same cache as PDFs; the "txt" tag keeps entries apart since the metadata differs
+            cache_key = (hashlib.blake2b(text.encode(), digest_size=20).hexdigest(), "txt")
+            cached = cls._get_cached_record(cache_key)
+            if cached is not None:
+                return [cached]
+            
             metadata = {"pages": 1, "file_type": "txt"}
             # Detect supplier and route to appropriate parser
             supplier = cls.detect_supplier(text)
             if supplier == "Iberdrola":
-                return [cls.parse_iberdrola_pdf(text, metadata)]
+                record = cls.parse_iberdrola_pdf(text, metadata)
             elif supplier == "Endesa":
-                return [cls.parse_endesa_pdf(text, metadata)]
+                record = cls.parse_endesa_pdf(text, metadata)
             elif supplier == "Naturgy":
-                return [cls.parse_naturgy_pdf(text, metadata)]
+                record = cls.parse_naturgy_pdf(text, metadata)
             elif supplier in ["Repsol", "Cepsa", "Galp", "Shell", "BP"]:
-                return [cls.parse_fuel_pdf(text, metadata, supplier)]
+                record = cls.parse_fuel_pdf(text, metadata, supplier)
             else:
-                return [cls.parse_generic_pdf(text, metadata)]
+                record = cls.parse_generic_pdf(text, metadata)
+            
+            cls._cache_record(cache_key, record)
+            return [record]
         else:
             # Return empty record
             return [UploadRecord(confidence=0.0, meta={"error": "Unsupported file type"})]
@@ -187,20 +382,41 @@ class DocumentParser:
     @classmethod
     def parse_pdf_invoice(cls, file_path: str) -> UploadRecord:
         """Parse PDF invoice (Spanish utilities) with detailed extraction logging"""
+        # Byte-identical file seen before: go straight to its cached record without MuPDF
+        file_digest = cls._file_digest(file_path)
+        if file_digest is not None:
+            with _record_cache_lock:
+                known_key = _pdf_file_keys.get(file_digest)
+            if known_key is not None:
+                cached = cls._get_cached_record(known_key)
+                if cached is not None:
+                    return cached
+        
         text, metadata = cls.extract_text_from_pdf(file_path)
         
         # Add extraction log for debugging
-        extraction_log = {
-            "ocr_text_length": len(text),
-            "ocr_text_preview": text[:500] if text else "No text extracted",
-            "patterns_tried": [],
-            "fields_found": [],
-            "fields_missing": []
-        }
+        extraction_log = None
+        if settings.OCR_DEBUG:
+            extraction_log = {
+                "ocr_text_length": len(text),
+                "ocr_text_preview": text[:500] if text else "No text extracted",
+                "patterns_tried": [],
+                "fields_found": [],
+                "fields_missing": []
+            }
         
         # Detect supplier
         supplier = cls.detect_supplier(text)
-        extraction_log["patterns_tried"].append({"field": "supplier", "result": supplier or "Not detected"})
+        if extraction_log is not None:
+            extraction_log["patterns_tried"].append({"field": "supplier", "result": supplier or "Not detected"})
+        
+        # Same text and supplier parse to the same record, reuse it for duplicate uploads
+        cache_key = (metadata.get("raw_text_hash"), supplier)
+        if cache_key[0] is not None:
+            cached = cls._get_cached_record(cache_key)
+            if cached is not None:
+                cls._remember_file_key(file_digest, cache_key)
+                return cached
         
         # Route to specific parser based on supplier
         if supplier == "Iberdrola":
@@ -217,11 +433,56 @@ class DocumentParser:
         # Add extraction log to result
         if not result.meta:
             result.meta = {}
-        if isinstance(result.meta, dict):
+        if extraction_log is not None and isinstance(result.meta, dict):
             result.meta["extraction_log"] = extraction_log
         
+        if cache_key[0] is not None:
+            cls._cache_record(cache_key, result)
+            cls._remember_file_key(file_digest, cache_key)
+        
         return result
     
+    @staticmethod
+    def _file_digest(file_path: str) -> Optional[str]:
+        """BLAKE2b of the raw file bytes, or None if the file can't be read"""
+        try:
+            with open(file_path, 'rb') as f:
+                return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=20)).hexdigest()
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _remember_file_key(file_digest: Optional[str], key: Tuple[str, Optional[str]]) -> None:
+        """Map a PDF file digest to its record cache key, evicting the least recently used"""
+        if file_digest is None:
+            return
+        with _record_cache_lock:
+            _pdf_file_keys[file_digest] = key
+            _pdf_file_keys.move_to_end(file_digest)
+            if len(_pdf_file_keys) > _RECORD_CACHE_SIZE:
+                _pdf_file_keys.popitem(last=False)
+    
+    @staticmethod
+    def _get_cached_record(key: Tuple[str, Optional[str]]) -> Optional[UploadRecord]:
+        """Return a copy of a previously parsed record, or None"""
+        with _record_cache_lock:
+            record = _record_cache.get(key)
+            if record is None:
+                return None
+            _record_cache.move_to_end(key)
+        # Callers mutate meta, so never hand out the cached instance
+        return record.model_copy(deep=True)
+    
+    @staticmethod
+    def _cache_record(key: Tuple[str, Optional[str]], record: UploadRecord) -> None:
+        """Store a copy of a parsed record, evicting the least recently used"""
+        record = record.model_copy(deep=True)
+        with _record_cache_lock:
+            _record_cache[key] = record
+            _record_cache.move_to_end(key)
+            if len(_record_cache) > _RECORD_CACHE_SIZE:
+                _record_cache.popitem(last=False)
+    
     @classmethod
     def parse_iberdrola_pdf(cls, text: str, metadata: Dict) -> UploadRecord:
         """Parse Iberdrola electricity invoice"""
@@ -235,39 +496,36 @@ class DocumentParser:
         confidence_score = 0.5  # Base score for supplier detection
         fields_found = 0
         total_fields = 6
+        text_lower = text.lower()
         
         # Invoice number: Factura nº: ES-2025-00421
-        invoice_match = re.search(r'Factura\s*n[ºo]:?\s*([A-Z0-9\-\/\.]+)', text, re.IGNORECASE)
+        invoice_match = cls._search_anchored(_IBERDROLA_PATTERNS["invoice"], text, text_lower, "factura")
         if invoice_match:
             record.invoice_number = invoice_match.group(1).strip()
             fields_found += 1
         
         # Issue date: Fecha de emisión: 02/06/2025
-        date_match = re.search(r'Fecha de emisi[óo]n:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})', text, re.IGNORECASE)
+        date_match = cls._search_anchored(_IBERDROLA_PATTERNS["issue_date"], text, text_lower, "fecha de emisi")
         if date_match:
             record.issue_date = cls.parse_spanish_date(date_match.group(1))
             fields_found += 1
         
         # Period: Periodo de facturación: 01/05/2025 - 31/05/2025
-        period_match = re.search(
-            r'Periodo de facturaci[óo]n:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})\s*[-–]\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})',
-            text,
-            re.IGNORECASE
-        )
+        period_match = cls._search_anchored(_IBERDROLA_PATTERNS["period"], text, text_lower, "periodo de facturaci")
         if period_match:
             record.period_start = cls.parse_spanish_date(period_match.group(1))
             record.period_end = cls.parse_spanish_date(period_match.group(2))
             fields_found += 1
         
         # Usage: Consumo total: 12.500 kWh
-        usage_match = re.search(r'Consumo(?:\s*total)?:?\s*([\d\.\,]+)\s*(kWh)', text, re.IGNORECASE)
+        usage_match = cls._search_anchored(_IBERDROLA_PATTERNS["usage"], text, text_lower, "consumo")
         if usage_match:
             record.usage_value = cls.normalize_spanish_number(usage_match.group(1))
             record.usage_unit = "kWh"
             fields_found += 1
         
         # Emission factor: Factor de emisión: 0,231 kg CO2/kWh
-        emission_match = re.search(r'Factor de emisi[óo]n:?\s*([\d\.\,]+)\s*kg\s*CO2\/kWh', text, re.IGNORECASE)
+        emission_match = cls._search_anchored(_IBERDROLA_PATTERNS["emission_factor"], text, text_lower, "factor de emisi")
         if emission_match:
             record.emission_factor = cls.normalize_spanish_number(emission_match.group(1))
             fields_found += 1
@@ -276,13 +534,13 @@ class DocumentParser:
             record.emission_factor = settings.ELECTRICITY_FACTOR_KG_PER_KWH
         
         # Total amount: Importe total (IVA 21%): 2.500,45 €
-        amount_match = re.search(r'Importe total.*?:\s*([\d\.\,]+)\s*€', text, re.IGNORECASE)
+        amount_match = cls._search_anchored(_IBERDROLA_PATTERNS["amount"], text, text_lower, "importe total")
         if amount_match:
             record.amount_total = cls.normalize_spanish_number(amount_match.group(1))
             fields_found += 1
         
         # VAT rate
-        vat_match = re.search(r'IVA\s*(\d{1,2})%', text, re.IGNORECASE)
+        vat_match = cls._search_anchored(_IBERDROLA_PATTERNS["vat"], text, text_lower, "iva")
         if vat_match:
             record.vat_rate = float(vat_match.group(1)) / 100
         
@@ -309,39 +567,36 @@ class DocumentParser:
         confidence_score = 0.5
         fields_found = 0
         total_fields = 5
+        text_lower = text.lower()
         
         # kWh facturados: 12500 kWh
-        usage_match = re.search(r'kWh facturados:?\s*([\d\.\,]+)\s*kWh', text, re.IGNORECASE)
+        usage_match = cls._search_anchored(_ENDESA_PATTERNS["usage"], text, text_lower, "kwh facturados")
         if usage_match:
             record.usage_value = cls.normalize_spanish_number(usage_match.group(1))
             record.usage_unit = "kWh"
             fields_found += 1
         
         # Fecha emisión: 02/06/2025
-        date_match = re.search(r'Fecha emisi[óo]n:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})', text, re.IGNORECASE)
+        date_match = cls._search_anchored(_ENDESA_PATTERNS["issue_date"], text, text_lower, "fecha emisi")
         if date_match:
             record.issue_date = cls.parse_spanish_date(date_match.group(1))
             fields_found += 1
         
         # Period
-        period_match = re.search(
-            r'Periodo:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})\s*[-–]\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})',
-            text,
-            re.IGNORECASE
-        )
+        period_match = cls._search_anchored(_ENDESA_PATTERNS["period"], text, text_lower, "periodo")
         if period_match:
             record.period_start = cls.parse_spanish_date(period_match.group(1))
             record.period_end = cls.parse_spanish_date(period_match.group(2))
             fields_found += 1
         
         # Total factura: 2500,45 €
-        amount_match = re.search(r'Total factura:?\s*([\d\.\,]+)\s*€', text, re.IGNORECASE)
+        amount_match = cls._search_anchored(_ENDESA_PATTERNS["amount"], text, text_lower, "total factura")
         if amount_match:
             record.amount_total = cls.normalize_spanish_number(amount_match.group(1))
             fields_found += 1
         
         # Emission factor (if present)
-        emission_match = re.search(r'([\d\.\,]+)\s*kg\s*CO2\/kWh', text, re.IGNORECASE)
+        emission_match = _ENDESA_PATTERNS["emission_factor"].search(text)
         if emission_match:
             record.emission_factor = cls.normalize_spanish_number(emission_match.group(1))
             fields_found += 1
@@ -372,14 +627,14 @@ class DocumentParser:
         total_fields = 5
         
         # Consumo: 1200 m3 or kWh
-        usage_match = re.search(r'Consumo.*?:?\s*([\d\.\,]+)\s*(m3|kWh)', text, re.IGNORECASE)
+        usage_match = _NATURGY_PATTERNS["usage"].search(text)
         if usage_match:
             value = cls.normalize_spanish_number(usage_match.group(1))
             unit = usage_match.group(2).lower()
             
             if unit == "m3":
                 # Convert m3 to kWh if conversion factor available
-                conversion_match = re.search(r'PCS.*?([\d\.\,]+)\s*kWh/m3', text, re.IGNORECASE)
+                conversion_match = _NATURGY_PATTERNS["pcs"].search(text)
                 if conversion_match:
                     pcs = cls.normalize_spanish_number(conversion_match.group(1))
                     record.usage_value = value * pcs
@@ -393,7 +648,7 @@ class DocumentParser:
             fields_found += 1
         
         # Emission factor for natural gas
-        emission_match = re.search(r'([\d\.\,]+)\s*kg\s*CO2\/kWh', text, re.IGNORECASE)
+        emission_match = _NATURGY_PATTERNS["emission_factor"].search(text)
         if emission_match:
             record.emission_factor = cls.normalize_spanish_number(emission_match.group(1))
             fields_found += 1
@@ -401,22 +656,18 @@ class DocumentParser:
             record.emission_factor = settings.NATURAL_GAS_FACTOR_KG_PER_KWH
         
         # Date and period (similar to Iberdrola)
-        date_match = re.search(r'Fecha.*?emisi[óo]n:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})', text, re.IGNORECASE)
+        date_match = _NATURGY_PATTERNS["issue_date"].search(text)
         if date_match:
             record.issue_date = cls.parse_spanish_date(date_match.group(1))
             fields_found += 1
         
-        period_match = re.search(
-            r'Periodo.*?:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})\s*[-–]\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})',
-            text,
-            re.IGNORECASE
-        )
+        period_match = _NATURGY_PATTERNS["period"].search(text)
         if period_match:
             record.period_start = cls.parse_spanish_date(period_match.group(1))
             record.period_end = cls.parse_spanish_date(period_match.group(2))
             fields_found += 1
         
-        amount_match = re.search(r'Total.*?:?\s*([\d\.\,]+)\s*€', text, re.IGNORECASE)
+        amount_match = _NATURGY_PATTERNS["amount"].search(text)
         if amount_match:
             record.amount_total = cls.normalize_spanish_number(amount_match.group(1))
             fields_found += 1
@@ -445,7 +696,7 @@ class DocumentParser:
         total_fields = 5
         
         # Litros or L
-        usage_match = re.search(r'([\d\.\,]+)\s*(Litros|L)\b', text, re.IGNORECASE)
+        usage_match = _FUEL_PATTERNS["usage"].search(text)
         if usage_match:
             record.usage_value = cls.normalize_spanish_number(usage_match.group(1))
             record.usage_unit = "L"
@@ -453,10 +704,10 @@ class DocumentParser:
         
         # Detect fuel type
         fuel_type = None
-        if re.search(r'gas[óo]leo|diesel|di[ée]sel', text, re.IGNORECASE):
+        if _FUEL_PATTERNS["diesel"].search(text):
             fuel_type = "diesel"
             record.emission_factor = settings.DIESEL_FACTOR_KG_PER_L
-        elif re.search(r'gasolina|gasoline|95|98', text, re.IGNORECASE):
+        elif _FUEL_PATTERNS["gasoline"].search(text):
             fuel_type = "gasoline"
             record.emission_factor = settings.GASOLINE_FACTOR_KG_PER_L
         
@@ -464,13 +715,13 @@ class DocumentParser:
             fields_found += 1
         
         # Date
-        date_match = re.search(r'Fecha:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})', text, re.IGNORECASE)
+        date_match = _FUEL_PATTERNS["issue_date"].search(text)
         if date_match:
             record.issue_date = cls.parse_spanish_date(date_match.group(1))
             fields_found += 1
         
         # Amount
-        amount_match = re.search(r'Total.*?:?\s*([\d\.\,]+)\s*€', text, re.IGNORECASE)
+        amount_match = _FUEL_PATTERNS["amount"].search(text)
         if amount_match:
             record.amount_total = cls.normalize_spanish_number(amount_match.group(1))
             fields_found += 1
@@ -485,6 +736,20 @@ class DocumentParser:
         
         return record
     
+    @staticmethod
+    def _search_lowered(pattern: re.Pattern, text: str, text_lower: Optional[str]) -> Optional[re.Match]:
+        """
+        Same result as pattern.search(text): the lowercase twin finds the offset
+        in text_lower, the original pattern re-matches there for original-case groups
+        """
+        if text_lower is None:
+            return pattern.search(text)
+        
+        match = _GENERIC_LOWERED[pattern].search(text_lower)
+        if match is None:
+            return None
+        return pattern.match(text, match.start()) or pattern.search(text)
+    
     @classmethod
     def parse_generic_pdf(cls, text: str, metadata: Dict) -> UploadRecord:
         """Generic PDF parser for unrecognized suppliers with detailed logging"""
@@ -496,51 +761,49 @@ class DocumentParser:
         )
         
         fields_found = 0
+        debug = settings.OCR_DEBUG
         extraction_attempts = []  # Track what we tried
         
+        # Lowercase once and scan case-sensitively. Only safe when lowering keeps
+        # offsets and there is no dotless i / long s, which IGNORECASE folds to ASCII
+        text_lower = text.lower()
+        search_lower = text_lower
+        if len(text_lower) != len(text) or "ı" in text or "ſ" in text:
+            search_lower = None
+        
         # Invoice number
-        invoice_patterns = [
-            r'Invoice\s*Number:?\s*([A-Z0-9\-\/\.]+)',
-            r'N[ºo]\s*Factura:?\s*([A-Z0-9\-\/\.]+)',
-            r'Factura:?\s*([A-Z0-9\-\/\.]+)'
-        ]
+        invoice_patterns = _GENERIC_PATTERNS["invoice"]
         invoice_found = False
         for pattern in invoice_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
                 record.invoice_number = match.group(1).strip()
                 fields_found += 1
                 invoice_found = True
-                extraction_attempts.append({"field": "invoice_number", "status": "found", "value": record.invoice_number})
+                if debug:
+                    extraction_attempts.append({"field": "invoice_number", "status": "found", "value": record.invoice_number})
                 break
-        if not invoice_found:
+        if debug and not invoice_found:
             extraction_attempts.append({"field": "invoice_number", "status": "missing", "patterns_tried": len(invoice_patterns)})
         
         # Date (try multiple formats)
-        date_patterns = [
-            r'Date:?\s*(\d{1,2}[\s\/\-]\w+[\s\/\-]\d{4})',  # 15 de Enero 2025
-            r'Fecha:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})',
-            r'(\d{2}[\/\-]\d{2}[\/\-]\d{4})'
-        ]
+        date_patterns = _GENERIC_PATTERNS["date"]
         date_found = False
         for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
                 try:
                     record.issue_date = cls.parse_spanish_date(match.group(1))
                     fields_found += 1
                     date_found = True
-                    extraction_attempts.append({"field": "date", "status": "found", "value": str(record.issue_date)})
+                    if debug:
+                        extraction_attempts.append({"field": "date", "status": "found", "value": str(record.issue_date)})
                     break
                 except:
                     pass
         
         # Period
-        period_match = re.search(
-            r'Per[ií]odo:?\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})\s*[-–]\s*(\d{2}[\/\-]\d{2}[\/\-]\d{4})',
-            text,
-            re.IGNORECASE
-        )
+        period_match = _GENERIC_PATTERNS["period"].search(text)
         if period_match:
             record.period_start = cls.parse_spanish_date(period_match.group(1))
             record.period_end = cls.parse_spanish_date(period_match.group(2))
@@ -548,177 +811,167 @@ class DocumentParser:
         
         # Try to detect category and extract usage
         # Electricity
-        if re.search(r'electric|kWh|energ[ií]a', text, re.IGNORECASE):
+        if cls._search_lowered(_GENERIC_PATTERNS["is_electricity"], text, search_lower):
             record.category = DocumentCategory.ELECTRICITY
             record.scope = 2
-            extraction_attempts.append({"field": "category", "status": "detected", "value": "electricity"})
+            if debug:
+                extraction_attempts.append({"field": "category", "status": "detected", "value": "electricity"})
             
-            usage_patterns = [
-                r'([\d\s\.\,]+)\s*kWh',
-                r'Consumo.*?:?\s*([\d\s\.\,]+)\s*kWh',
-                r'Energy\s*Consumption:?\s*([\d\s\.\,]+)\s*kWh',
-                r'energ[ií]a\s*activa.*?:?\s*([\d\s\.\,]+)\s*kWh'
-            ]
+            usage_patterns = _GENERIC_PATTERNS["kwh_usage"]
             usage_found = False
             for pattern in usage_patterns:
-                usage_match = re.search(pattern, text, re.IGNORECASE)
+                usage_match = cls._search_lowered(pattern, text, search_lower)
                 if usage_match:
                     record.usage_value = cls.normalize_spanish_number(usage_match.group(1))
                     record.usage_unit = "kWh"
                     record.emission_factor = settings.ELECTRICITY_FACTOR_KG_PER_KWH
                     fields_found += 1
                     usage_found = True
-                    extraction_attempts.append({
-                        "field": "usage_value",
-                        "status": "found",
-                        "value": record.usage_value,
-                        "pattern": pattern,
-                        "matched_text": usage_match.group(0)
-                    })
+                    if debug:
+                        extraction_attempts.append({
+                            "field": "usage_value",
+                            "status": "found",
+                            "value": record.usage_value,
+                            "pattern": pattern.pattern,
+                            "matched_text": usage_match.group(0)
+                        })
                     break
             
-            if not usage_found:
+            if debug and not usage_found:
                 # Find sample text around kWh for debugging
                 sample_text = ""
-                idx = text.lower().find('kwh')
+                idx = text_lower.find('kwh')
                 if idx != -1:
                     sample_text = text[max(0, idx-80):min(len(text), idx+50)]
                 extraction_attempts.append({
                     "field": "usage_value",
                     "status": "missing",
-                    "patterns_tried": usage_patterns,
+                    "patterns_tried": [p.pattern for p in usage_patterns],
                     "text_sample": sample_text or text[:200]
                 })
         
         # Gas
-        elif re.search(r'gas|m³|m3', text, re.IGNORECASE):
+        elif cls._search_lowered(_GENERIC_PATTERNS["is_gas"], text, search_lower):
             record.category = DocumentCategory.NATURAL_GAS
             record.scope = 1
-            extraction_attempts.append({"field": "category", "status": "detected", "value": "gas"})
+            if debug:
+                extraction_attempts.append({"field": "category", "status": "detected", "value": "gas"})
             
-            usage_patterns = [
-                r'([\d\s\.\,]+)\s*m[³3]',
-                r'Consumo.*?:?\s*([\d\s\.\,]+)\s*m[³3]',
-                r'Volume:?\s*([\d\s\.\,]+)\s*m[³3]'
-            ]
+            usage_patterns = _GENERIC_PATTERNS["m3_usage"]
             usage_found = False
             for pattern in usage_patterns:
-                usage_match = re.search(pattern, text, re.IGNORECASE)
+                usage_match = cls._search_lowered(pattern, text, search_lower)
                 if usage_match:
                     record.usage_value = cls.normalize_spanish_number(usage_match.group(1))
                     record.usage_unit = "m3"
                     record.emission_factor = settings.GAS_FACTOR_KG_PER_M3
                     fields_found += 1
                     usage_found = True
-                    extraction_attempts.append({
-                        "field": "usage_value",
-                        "status": "found",
-                        "value": record.usage_value,
-                        "pattern": pattern,
-                        "matched_text": usage_match.group(0)
-                    })
+                    if debug:
+                        extraction_attempts.append({
+                            "field": "usage_value",
+                            "status": "found",
+                            "value": record.usage_value,
+                            "pattern": pattern.pattern,
+                            "matched_text": usage_match.group(0)
+                        })
                     break
             
-            if not usage_found:
+            if debug and not usage_found:
                 sample_text = ""
-                idx = text.lower().find('m³') if 'm³' in text.lower() else text.lower().find('m3')
+                idx = text_lower.find('m³') if 'm³' in text_lower else text_lower.find('m3')
                 if idx != -1:
                     sample_text = text[max(0, idx-80):min(len(text), idx+50)]
                 extraction_attempts.append({
                     "field": "usage_value",
                     "status": "missing",
-                    "patterns_tried": usage_patterns,
+                    "patterns_tried": [p.pattern for p in usage_patterns],
                     "text_sample": sample_text or text[:200]
                 })
         
         # Fuel
-        elif re.search(r'diesel|gasolina|combustible|litros?|L\b', text, re.IGNORECASE):
+        elif fuel_match := cls._search_lowered(_GENERIC_PATTERNS["is_fuel"], text, search_lower):
             record.category = DocumentCategory.FUEL
             record.scope = 1
-            extraction_attempts.append({"field": "category", "status": "detected", "value": "fuel"})
+            if debug:
+                extraction_attempts.append({"field": "category", "status": "detected", "value": "fuel"})
             
-            usage_patterns = [
-                r'([\d\s\.\,]+)\s*(Litros|L)\b',
-                r'Volume:?\s*([\d\s\.\,]+)\s*L',
-                r'Cantidad:?\s*([\d\s\.\,]+)\s*Litros'
-            ]
+            usage_patterns = _GENERIC_PATTERNS["liters_usage"]
             usage_found = False
             for pattern in usage_patterns:
-                usage_match = re.search(pattern, text, re.IGNORECASE)
+                usage_match = cls._search_lowered(pattern, text, search_lower)
                 if usage_match:
                     record.usage_value = cls.normalize_spanish_number(usage_match.group(1))
                     record.usage_unit = "L"
-                    if re.search(r'diesel', text, re.IGNORECASE):
+                    # The category hit may already be the diesel keyword, skip the rescan then
+                    if (fuel_match.group(0).lower() == "diesel"
+                            or cls._search_lowered(_GENERIC_PATTERNS["diesel"], text, search_lower)):
                         record.emission_factor = settings.DIESEL_FACTOR_KG_PER_L
                     else:
                         record.emission_factor = settings.GASOLINE_FACTOR_KG_PER_L
                     fields_found += 1
                     usage_found = True
-                    extraction_attempts.append({
-                        "field": "usage_value",
-                        "status": "found",
-                        "value": record.usage_value,
-                        "pattern": pattern,
-                        "matched_text": usage_match.group(0)
-                    })
+                    if debug:
+                        extraction_attempts.append({
+                            "field": "usage_value",
+                            "status": "found",
+                            "value": record.usage_value,
+                            "pattern": pattern.pattern,
+                            "matched_text": usage_match.group(0)
+                        })
                     break
             
-            if not usage_found:
+            if debug and not usage_found:
                 sample_text = ""
                 for keyword in ['litros', 'liters', 'l\b']:
-                    idx = text.lower().find(keyword[:5])
+                    idx = text_lower.find(keyword[:5])
                     if idx != -1:
                         sample_text = text[max(0, idx-80):min(len(text), idx+50)]
                         break
                 extraction_attempts.append({
                     "field": "usage_value",
                     "status": "missing",
-                    "patterns_tried": usage_patterns,
+                    "patterns_tried": [p.pattern for p in usage_patterns],
                     "text_sample": sample_text or text[:200]
                 })
         
         # Freight
-        elif re.search(r'transport|freight|env[ií]o|distancia|km', text, re.IGNORECASE):
+        elif cls._search_lowered(_GENERIC_PATTERNS["is_freight"], text, search_lower):
             record.category = DocumentCategory.FREIGHT
             record.scope = 3
-            extraction_attempts.append({"field": "category", "status": "detected", "value": "freight"})
+            if debug:
+                extraction_attempts.append({"field": "category", "status": "detected", "value": "freight"})
             
-            distance_patterns = [
-                r'([\d\.\,]+)\s*km',
-                r'Distance:?\s*([\d\.\,]+)\s*km',
-                r'Distancia:?\s*([\d\.\,]+)\s*km'
-            ]
+            distance_patterns = _GENERIC_PATTERNS["distance"]
             distance_found = False
             for pattern in distance_patterns:
-                distance_match = re.search(pattern, text, re.IGNORECASE)
+                distance_match = cls._search_lowered(pattern, text, search_lower)
                 if distance_match:
                     distance = cls.normalize_spanish_number(distance_match.group(1))
                     distance_found = True
-                    extraction_attempts.append({
-                        "field": "distance",
-                        "status": "found",
-                        "value": distance,
-                        "pattern": pattern
-                    })
+                    if debug:
+                        extraction_attempts.append({
+                            "field": "distance",
+                            "status": "found",
+                            "value": distance,
+                            "pattern": pattern.pattern
+                        })
                     break
             
-            weight_patterns = [
-                r'([\d\.\,]+)\s*kg',
-                r'Weight:?\s*([\d\.\,]+)\s*kg',
-                r'Peso:?\s*([\d\.\,]+)\s*kg'
-            ]
+            weight_patterns = _GENERIC_PATTERNS["weight"]
             weight_found = False
             for pattern in weight_patterns:
-                weight_match = re.search(pattern, text, re.IGNORECASE)
+                weight_match = cls._search_lowered(pattern, text, search_lower)
                 if weight_match:
                     weight = cls.normalize_spanish_number(weight_match.group(1))
                     weight_found = True
-                    extraction_attempts.append({
-                        "field": "weight",
-                        "status": "found",
-                        "value": weight,
-                        "pattern": pattern
-                    })
+                    if debug:
+                        extraction_attempts.append({
+                            "field": "weight",
+                            "status": "found",
+                            "value": weight,
+                            "pattern": pattern.pattern
+                        })
                     break
             
             if distance_found and weight_found:
@@ -727,70 +980,68 @@ class DocumentParser:
                 # Simplified freight calculation
                 record.co2e_kg = (distance * weight * 0.00012)  # Rough estimate
                 fields_found += 1
-                extraction_attempts.append({
-                    "field": "emissions",
-                    "status": "calculated",
-                    "value": f"{record.co2e_kg:.2f} kg",
-                    "formula": f"{distance} km × {weight} kg × 0.00012"
-                })
+                if debug:
+                    extraction_attempts.append({
+                        "field": "emissions",
+                        "status": "calculated",
+                        "value": f"{record.co2e_kg:.2f} kg",
+                        "formula": f"{distance} km × {weight} kg × 0.00012"
+                    })
             else:
-                if not distance_found:
+                if debug and not distance_found:
                     extraction_attempts.append({
                         "field": "distance",
                         "status": "missing",
-                        "patterns_tried": distance_patterns
+                        "patterns_tried": [p.pattern for p in distance_patterns]
                     })
-                if not weight_found:
+                if debug and not weight_found:
                     extraction_attempts.append({
                         "field": "weight",
                         "status": "missing",
-                        "patterns_tried": weight_patterns
+                        "patterns_tried": [p.pattern for p in weight_patterns]
                     })
-        else:
+        elif debug:
             extraction_attempts.append({"field": "category", "status": "not_detected", "keywords_searched": ["electric", "gas", "fuel", "freight"]})
         
         # Amount
-        amount_patterns = [
-            r'Total:?\s*([\d\.\,]+)\s*EUR',
-            r'Importe:?\s*([\d\.\,]+)\s*€',
-            r'([\d\.\,]+)\s*EUR',
-            r'([\d\.\,]+)\s*€'
-        ]
+        amount_patterns = _GENERIC_PATTERNS["amount"]
         amount_found = False
         for pattern in amount_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = cls._search_lowered(pattern, text, search_lower)
             if match:
                 record.amount_total = cls.normalize_spanish_number(match.group(1))
                 record.currency = "EUR"
                 fields_found += 1
                 amount_found = True
-                extraction_attempts.append({
-                    "field": "amount_total",
-                    "status": "found",
-                    "value": record.amount_total,
-                    "pattern": pattern,
-                    "matched_text": match.group(0)
-                })
+                if debug:
+                    extraction_attempts.append({
+                        "field": "amount_total",
+                        "status": "found",
+                        "value": record.amount_total,
+                        "pattern": pattern.pattern,
+                        "matched_text": match.group(0)
+                    })
                 break
         
-        if not amount_found:
+        if debug and not amount_found:
             extraction_attempts.append({
                 "field": "amount_total",
                 "status": "missing",
-                "patterns_tried": amount_patterns
+                "patterns_tried": [p.pattern for p in amount_patterns]
             })
         
         # Calculate emissions if we have usage and factor
         if record.usage_value and record.emission_factor and not record.co2e_kg:
             record.co2e_kg = record.usage_value * record.emission_factor
             fields_found += 1
-            extraction_attempts.append({
-                "field": "emissions",
-                "status": "calculated",
-                "value": f"{record.co2e_kg:.2f} kg",
-                "formula": f"{record.usage_value} {record.usage_unit} × {record.emission_factor}"
-            })
-        elif not record.co2e_kg:
+            if debug:
+                extraction_attempts.append({
+                    "field": "emissions",
+                    "status": "calculated",
+                    "value": f"{record.co2e_kg:.2f} kg",
+                    "formula": f"{record.usage_value} {record.usage_unit} × {record.emission_factor}"
+                })
+        elif debug and not record.co2e_kg:
             extraction_attempts.append({
                 "field": "emissions",
                 "status": "not_calculated",
@@ -800,10 +1051,9 @@ class DocumentParser:
         # Update confidence based on fields found
         record.confidence = 0.3 + (fields_found / 8) * 0.6  # Max 0.9
         
-        # Store extraction log in meta
-        if not isinstance(record.meta, dict):
-            record.meta = {}
-        record.meta['extraction_attempts'] = extraction_attempts
+        # Store extraction log in meta (always a dict, the record is built with meta=... or {})
+        if debug:
+            record.meta['extraction_attempts'] = extraction_attempts
         record.meta['fields_found_count'] = fields_found
         
         return record
@@ -821,14 +1071,14 @@ class DocumentParser:
     def parse_xlsx(cls, file_path: str) -> List[UploadRecord]:
         """Parse Excel file with flexible column mapping - supports multiple sheets and rows"""
         try:
-            # Read all sheets
-            excel_file = pd.ExcelFile(file_path)
+            # Read all sheets from one open workbook instead of reloading the file per sheet
             all_records = []
             
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                sheet_records = cls._parse_tabular_data(df, sheet_name=sheet_name)
-                all_records.extend(sheet_records)
+            with pd.ExcelFile(file_path, engine=EXCEL_ENGINE) as excel_file:
+                for sheet_name in excel_file.sheet_names:
+                    df = excel_file.parse(sheet_name)
+                    sheet_records = cls._parse_tabular_data(df, sheet_name=sheet_name)
+                    all_records.extend(sheet_records)
             
             return all_records if all_records else [UploadRecord(confidence=0.0, meta={"error": "No data found"})]
         except Exception as e:
@@ -858,15 +1108,38 @@ class DocumentParser:
         
         records = []
         
+        # Plain ndarray rows: the values iterrows would wrap in a Series, without the Series
+        col_idx = {}
+        for i, col in enumerate(df.columns):
+            col_idx.setdefault(col, i)
+        rows = df.to_numpy()
+        if rows.dtype.kind in "mM":
+            rows = df.to_numpy(dtype=object)  # Box as Timestamp/Timedelta like Series access does
+        
+        # Resolve each target to its first matching column once per sheet, with the
+        # column's notna mask computed in one vectorised pass instead of per cell
+        resolved_columns = []
+        for target, synonyms in column_map.items():
+            column = next((syn for syn in synonyms if syn in col_idx), None)
+            present = df.iloc[:, col_idx[column]].notna().to_numpy() if column is not None else None
+            resolved_columns.append((target, synonyms, column, present))
+        columns_available = list(df.columns)
+        
+        # Date strings repeat across rows and parsing each with pd.to_datetime is slow
+        parsed_dates = {}
+        debug = settings.OCR_DEBUG
+        
         # Loop through each row in the dataframe
-        for idx, row in df.iterrows():
+        for i, (idx, row) in enumerate(zip(df.index, rows)):
             record = UploadRecord()
             fields_found = 0
-            extraction_log = {
-                "columns_available": list(df.columns),
-                "column_mappings": {},
-                "unmapped_fields": []
-            }
+            extraction_log = None
+            if debug:
+                extraction_log = {
+                    "columns_available": columns_available.copy(),
+                    "column_mappings": {},
+                    "unmapped_fields": []
+                }
             
             # Add sheet/row info to meta
             if sheet_name:
@@ -875,32 +1148,35 @@ class DocumentParser:
                 record.meta = {"row": idx + 1}
             
             # Map columns with logging
-            for target, synonyms in column_map.items():
+            for target, synonyms, column, present in resolved_columns:
                 mapped = False
-                for syn in synonyms:
-                    if syn in df.columns:
-                        value = row[syn]
-                        if pd.notna(value):
-                            extraction_log["column_mappings"][target] = {"column": syn, "value": str(value)[:100]}
-                            if target == 'date':
-                                record.issue_date = pd.to_datetime(value, errors='coerce')
-                            elif target == 'supplier':
-                                record.supplier = str(value)
-                            elif target == 'usage_value':
-                                record.usage_value = float(value) if isinstance(value, (int, float)) else None
-                            elif target == 'usage_unit':
-                                record.usage_unit = str(value)
-                            elif target == 'amount_total':
-                                record.amount_total = float(value) if isinstance(value, (int, float)) else None
-                            elif target == 'invoice_number':
-                                record.invoice_number = str(value)
-                            elif target == 'scope':
-                                record.scope = int(value) if isinstance(value, (int, float)) else None
-                            fields_found += 1
-                            mapped = True
-                        break
+                if column is not None and present[i]:
+                    value = row[col_idx[column]]
+                    if debug:
+                        extraction_log["column_mappings"][target] = {"column": column, "value": str(value)[:100]}
+                    if target == 'date':
+                        if isinstance(value, str):
+                            if value not in parsed_dates:
+                                parsed_dates[value] = pd.to_datetime(value, errors='coerce')
+                            record.issue_date = parsed_dates[value]
+                        else:
+                            record.issue_date = pd.to_datetime(value, errors='coerce')
+                    elif target == 'supplier':
+                        record.supplier = str(value)
+                    elif target == 'usage_value':
+                        record.usage_value = float(value) if isinstance(value, (int, float)) else None
+                    elif target == 'usage_unit':
+                        record.usage_unit = str(value)
+                    elif target == 'amount_total':
+                        record.amount_total = float(value) if isinstance(value, (int, float)) else None
+                    elif target == 'invoice_number':
+                        record.invoice_number = str(value)
+                    elif target == 'scope':
+                        record.scope = int(value) if isinstance(value, (int, float)) else None
+                    fields_found += 1
+                    mapped = True
                 
-                if not mapped:
+                if debug and not mapped:
                     extraction_log["unmapped_fields"].append({
                         "field": target,
                         "searched_columns": synonyms,
@@ -910,41 +1186,30 @@ class DocumentParser:
             # Determine category and scope from usage_unit or context
             if record.usage_unit:
                 unit_lower = record.usage_unit.lower()
-                if 'kwh' in unit_lower:
-                    record.category = DocumentCategory.ELECTRICITY
-                    record.scope = 2
-                    record.emission_factor = settings.ELECTRICITY_FACTOR_KG_PER_KWH
-                    extraction_log["category_detection"] = {"method": "from_unit", "unit": unit_lower, "category": "electricity"}
-                elif 'm3' in unit_lower:
-                    record.category = DocumentCategory.NATURAL_GAS
-                    record.scope = 1
-                    # Use IPCC 2006 factor for natural gas: 2.016 kg CO2e per m³
-                    record.emission_factor = 2.016
-                    extraction_log["category_detection"] = {"method": "from_unit", "unit": unit_lower, "category": "gas"}
-                elif 'l' in unit_lower or 'litros' in unit_lower:
-                    record.category = DocumentCategory.FUEL
-                    record.scope = 1
-                    record.emission_factor = settings.DIESEL_FACTOR_KG_PER_L
-                    extraction_log["category_detection"] = {"method": "from_unit", "unit": unit_lower, "category": "fuel"}
-                elif 'km' in unit_lower or 'tkm' in unit_lower:
-                    record.category = DocumentCategory.FREIGHT
-                    record.scope = 3
-                    record.emission_factor = settings.ROAD_FREIGHT_FACTOR_KG_PER_TKM
-                    extraction_log["category_detection"] = {"method": "from_unit", "unit": unit_lower, "category": "freight"}
+                for token, category, scope, factor, label in _UNIT_RULES:
+                    if token in unit_lower:
+                        record.category = category
+                        record.scope = scope
+                        record.emission_factor = factor
+                        if debug:
+                            extraction_log["category_detection"] = {"method": "from_unit", "unit": unit_lower, "category": label}
+                        break
                 else:
-                    extraction_log["category_detection"] = {"method": "from_unit", "unit": unit_lower, "category": "unknown_unit"}
-            else:
+                    if debug:
+                        extraction_log["category_detection"] = {"method": "from_unit", "unit": unit_lower, "category": "unknown_unit"}
+            elif debug:
                 extraction_log["category_detection"] = {"method": "not_detected", "reason": "no_usage_unit_found"}
             
             # Calculate CO2e
             if record.usage_value and record.emission_factor:
                 record.co2e_kg = record.usage_value * record.emission_factor
-                extraction_log["emissions_calculation"] = {
-                    "status": "calculated",
-                    "formula": f"{record.usage_value} × {record.emission_factor}",
-                    "result": f"{record.co2e_kg:.2f} kg"
-                }
-            else:
+                if debug:
+                    extraction_log["emissions_calculation"] = {
+                        "status": "calculated",
+                        "formula": f"{record.usage_value} × {record.emission_factor}",
+                        "result": f"{record.co2e_kg:.2f} kg"
+                    }
+            elif debug:
                 extraction_log["emissions_calculation"] = {
                     "status": "not_calculated",
                     "reason": f"usage_value={record.usage_value}, emission_factor={record.emission_factor}"
@@ -954,9 +1219,10 @@ class DocumentParser:
             record.confidence = min(0.3 + (fields_found / 6) * 0.7, 1.0)
             record.meta.update({
                 "source": "csv/xlsx",
-                "fields_found": fields_found,
-                "extraction_log": extraction_log
+                "fields_found": fields_found
             })
+            if debug:
+                record.meta["extraction_log"] = extraction_log
             
             # Only add records with some valid data
             if fields_found > 0:
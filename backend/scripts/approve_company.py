@@ -9,7 +9,7 @@ from pathlib import Path
 # Add parent directory to path to import app modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.database import SessionLocal
 from app.models.database import Company, User, UserRole
 from app.services.auth import hash_password, generate_random_password
@@ -25,106 +25,112 @@ def approve_company(company_name: str, user_email: str, password: str = None):
         user_email: Email for the user account
         password: Optional password (will be auto-generated if not provided)
     """
-    db: Session = SessionLocal()
-    
-    try:
-        # Find company
-        company = db.query(Company).filter(Company.name == company_name).first()
-        
-        if not company:
-            print(f"❌ Error: Company '{company_name}' not found")
-            print("Available pending companies:")
-            pending = db.query(Company).filter(Company.approved == False).all()
-            for c in pending:
-                print(f"  - {c.name} ({c.contact_email})")
-            return
-        
-        if company.approved:
-            print(f"⚠️  Company '{company_name}' is already approved")
-            return
-        
-        # Generate password if not provided (bcrypt max is 72 bytes)
-        if not password:
-            password = generate_random_password(length=12)  # Shorter to avoid bcrypt limit
-            print(f"🔑 Generated password: {password}")
-        
-        # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user_email).first()
-        if existing_user:
-            print(f"❌ Error: User with email '{user_email}' already exists")
-            return
-        
-        # Approve company
-        company.approved = True
-        
-        # Create user
-        user = User(
-            company_id=company.id,
-            email=user_email,
-            password_hash=hash_password(password),
-            approved=True,
-            role=UserRole.COMPANY
-        )
-        
-        db.add(user)
-        db.commit()
-        db.refresh(company)
-        db.refresh(user)
-        
-        print(f"✅ Company '{company_name}' approved successfully")
-        print(f"✅ User created: {user_email}")
-        
-        # Send credentials email
+    with SessionLocal() as db:
         try:
-            EmailService.send_credentials_email(
-                to_email=company.contact_email or user_email,
-                company_name=company.name,
-                user_email=user_email,
-                password=password,
-                language="es"  # Default to Spanish
+            # Find company
+            company = db.query(Company).filter(Company.name == company_name).first()
+            
+            if not company:
+                print(f"❌ Error: Company '{company_name}' not found")
+                print("Available pending companies (first 20, use --list for all):")
+                pending = db.query(Company.name, Company.contact_email).filter(
+                    Company.approved == False
+                ).order_by(Company.created_at).limit(20).all()
+                for name, contact_email in pending:
+                    print(f"  - {name} ({contact_email})")
+                return
+            
+            if company.approved:
+                print(f"⚠️  Company '{company_name}' is already approved")
+                return
+            
+            # Generate password if not provided (bcrypt max is 72 bytes)
+            if not password:
+                password = generate_random_password(length=12)  # Shorter to avoid bcrypt limit
+                print(f"🔑 Generated password: {password}")
+            
+            # Check if user already exists (cheap, and spares the bcrypt hash on re-runs)
+            existing_user = db.query(User.id).filter(User.email == user_email).first()
+            if existing_user:
+                print(f"❌ Error: User with email '{user_email}' already exists")
+                return
+            
+            # Approve company
+            company.approved = True
+            
+            # Create user; ON CONFLICT guards against a concurrent insert of the same email
+            result = db.execute(
+                pg_insert(User).values(
+                    company_id=company.id,
+                    email=user_email,
+                    password_hash=hash_password(password),
+                    approved=True,
+                    role=UserRole.COMPANY
+                ).on_conflict_do_nothing(index_elements=[User.email])
             )
-            print(f"📧 Credentials email sent to {company.contact_email or user_email}")
+            if result.rowcount == 0:
+                db.rollback()
+                print(f"❌ Error: User with email '{user_email}' already exists")
+                return
+            
+            # commit() expires the company, so keep what is printed below
+            approved_name = company.name
+            recipient = company.contact_email or user_email
+            
+            db.commit()
+            
+            print(f"✅ Company '{company_name}' approved successfully")
+            print(f"✅ User created: {user_email}")
+            
+            # Send credentials email
+            try:
+                EmailService.send_credentials_email(
+                    to_email=recipient,
+                    company_name=approved_name,
+                    user_email=user_email,
+                    password=password,
+                    language="es"  # Default to Spanish
+                )
+                print(f"📧 Credentials email sent to {recipient}")
+            except Exception as e:
+                print(f"⚠️  Failed to send email: {e}")
+                print(f"⚠️  Please manually send credentials to user:")
+                print(f"   Email: {user_email}")
+                print(f"   Password: {password}")
+            
+            print("\n🎉 Approval complete!")
+            print(f"Company: {approved_name}")
+            print(f"User Email: {user_email}")
+            print(f"Password: {password}")
+            print(f"Login URL: https://getluma.es/login")
+            
         except Exception as e:
-            print(f"⚠️  Failed to send email: {e}")
-            print(f"⚠️  Please manually send credentials to user:")
-            print(f"   Email: {user_email}")
-            print(f"   Password: {password}")
-        
-        print("\n🎉 Approval complete!")
-        print(f"Company: {company.name}")
-        print(f"User Email: {user_email}")
-        print(f"Password: {password}")
-        print(f"Login URL: https://getluma.es/login")
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        db.rollback()
-    finally:
-        db.close()
+            print(f"❌ Error: {e}")
+            db.rollback()
 
 
 def list_pending_companies():
     """List all pending companies"""
-    db: Session = SessionLocal()
-    
-    try:
-        pending = db.query(Company).filter(Company.approved == False).all()
+    with SessionLocal() as db:
+        # Only the printed columns, streamed in batches rather than loaded all at once
+        pending = db.query(
+            Company.name, Company.contact_email, Company.sector, Company.created_at
+        ).filter(Company.approved == False).yield_per(200)
         
-        if not pending:
-            print("No pending companies")
-            return
-        
-        print("\n📋 Pending Companies:")
-        print("-" * 60)
-        for company in pending:
-            print(f"Name: {company.name}")
-            print(f"Contact: {company.contact_email}")
-            print(f"Sector: {company.sector or 'N/A'}")
-            print(f"Registered: {company.created_at.strftime('%Y-%m-%d %H:%M')}")
+        found = False
+        for name, contact_email, sector, created_at in pending:
+            if not found:
+                print("\n📋 Pending Companies:")
+                print("-" * 60)
+                found = True
+            print(f"Name: {name}")
+            print(f"Contact: {contact_email}")
+            print(f"Sector: {sector or 'N/A'}")
+            print(f"Registered: {created_at.strftime('%Y-%m-%d %H:%M')}")
             print("-" * 60)
-    
-    finally:
-        db.close()
+        
+        if not found:
+            print("No pending companies")
 
 
 if __name__ == "__main__":
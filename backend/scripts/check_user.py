@@ -6,24 +6,24 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from sqlalchemy.orm import joinedload
 from app.database import SessionLocal
-from app.models.database import User, Company
+from app.models.database import User
 from app.services.auth import verify_password
 
 
 def check_user(email: str, password: str = None):
     """Check if user exists and optionally verify password"""
-    db = SessionLocal()
-    
-    try:
-        user = db.query(User).filter(User.email == email).first()
+    with SessionLocal() as db:
+        # Load the user's company in the same SELECT
+        user = db.query(User).options(joinedload(User.company)).filter(User.email == email).first()
         
         if not user:
             print(f"❌ User not found: {email}")
-            print("\nAvailable users:")
-            all_users = db.query(User).all()
-            for u in all_users:
-                print(f"  - {u.email} (approved: {u.approved})")
+            print("\nAvailable users (first 50):")
+            all_users = db.query(User.email, User.approved).order_by(User.email).limit(50).all()
+            for user_email, approved in all_users:
+                print(f"  - {user_email} (approved: {approved})")
             return
         
         print(f"✅ User found: {email}")
@@ -34,7 +34,7 @@ def check_user(email: str, password: str = None):
         print(f"  Password hash: {user.password_hash[:50]}...")
         
         # Check company
-        company = db.query(Company).filter(Company.id == user.company_id).first()
+        company = user.company
         if company:
             print(f"\n✅ Company found: {company.name}")
             print(f"  Approved: {company.approved}")
@@ -52,9 +52,6 @@ def check_user(email: str, password: str = None):
                     print(f"❌ Password is incorrect!")
             except Exception as e:
                 print(f"❌ Error verifying password: {e}")
-        
-    finally:
-        db.close()
 
 
 if __name__ == "__main__":
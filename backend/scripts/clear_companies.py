@@ -1,6 +1,7 @@
 """
 Clear all companies from the database
 This will DELETE all company records but keep the table structure
+Usage: python clear_companies.py [--yes]
 """
 import sys
 from pathlib import Path
@@ -8,48 +9,47 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models.database import Company
 
 
-def main():
+def main(assume_yes: bool = False):
     print("⚠️  WARNING: This will DELETE all companies from the database!")
     print()
     
-    # List current companies
-    db = SessionLocal()
-    try:
-        companies = db.query(Company).all()
-        if companies:
-            print(f"📋 Current companies ({len(companies)}):")
-            for company in companies:
-                email = company.contact_email or "No email"
-                print(f"  - {company.name} ({email}) - Approved: {company.approved}")
-            print()
-        else:
-            print("📋 No companies found in database")
-            print()
-            return
-        
-        confirm = input("Type 'CLEAR' to delete all companies: ")
-        
-        if confirm != "CLEAR":
-            print("❌ Aborted")
-            return
-        
-        print("\n🗑️  Clearing companies...")
-        count = db.query(Company).delete()
-        db.commit()
-        print(f"✅ Deleted {count} companies successfully!")
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        db.rollback()
-        sys.exit(1)
-    finally:
-        db.close()
+    with SessionLocal() as db:
+        try:
+            # --yes skips the listing and the prompt
+            if not assume_yes:
+                # List current companies
+                companies = db.query(Company.name, Company.contact_email, Company.approved).all()
+                if companies:
+                    print(f"📋 Current companies ({len(companies)}):")
+                    for name, contact_email, approved in companies:
+                        email = contact_email or "No email"
+                        print(f"  - {name} ({email}) - Approved: {approved}")
+                    print()
+                else:
+                    print("📋 No companies found in database")
+                    print()
+                    return
+                
+                confirm = input("Type 'CLEAR' to delete all companies: ")
+                
+                if confirm != "CLEAR":
+                    print("❌ Aborted")
+                    return
+            
+            print("\n🗑️  Clearing companies...")
+            count = db.query(Company).delete()
+            db.commit()
+            print(f"✅ Deleted {count} companies successfully!")
+            
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            db.rollback()
+            sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
+    main(assume_yes="--yes" in sys.argv[1:])
@@ -14,6 +14,9 @@ sys.path.insert(0, str(backend_dir))
 
 from agents.data_intake_agent import DataIntakeAgent
 
+# One agent for every test: the constructor builds a Supabase client
+AGENT = DataIntakeAgent()
+
 
 def test_invoice_parsing():
     """Test the invoice text parser"""
@@ -38,8 +41,7 @@ def test_invoice_parsing():
     Total: 190,22 €
     """
     
-    agent = DataIntakeAgent()
-    result = agent._parse_invoice_text(sample_text)
+    result = AGENT._parse_invoice_text(sample_text)
     
     print("✅ Test: Invoice Text Parsing")
     print(f"Extracted data: {result}")
@@ -59,8 +61,6 @@ def test_invoice_parsing():
 def test_normalization():
     """Test data normalization"""
     
-    agent = DataIntakeAgent()
-    
     raw_data = {
         "supplier": "Iberdrola",
         "category": "electricity",
@@ -70,7 +70,7 @@ def test_normalization():
         "invoice_number": "INV-2025-09-001"
     }
     
-    normalized = agent._normalize_data(raw_data)
+    normalized = AGENT._normalize_data(raw_data)
     
     print("✅ Test: Data Normalization")
     print(f"Normalized data: {normalized}")
@@ -87,8 +87,6 @@ def test_normalization():
 def test_file_type_detection():
     """Test file type detection"""
     
-    agent = DataIntakeAgent()
-    
     test_cases = [
         ("invoice.pdf", "pdf"),
         ("data.csv", "csv"),
@@ -99,7 +97,7 @@ def test_file_type_detection():
     
     print("✅ Test: File Type Detection")
     for filename, expected in test_cases:
-        detected = agent._detect_file_type("", filename)
+        detected = AGENT._detect_file_type("", filename)
         print(f"  {filename} -> {detected}")
         assert detected == expected, f"Failed for {filename}"
     
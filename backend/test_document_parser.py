@@ -0,0 +1,284 @@
+"""
+Test DocumentParser field extraction
+
+Tests the invoice extraction on raw text and small generated PDFs.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+# Add backend to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services import ocr
+from app.services.ocr import DocumentParser
+from app.models.schemas import UploadRecord
+
+
+def _clear_caches():
+    """Start each cache test from empty process-wide caches"""
+    with ocr._record_cache_lock:
+        ocr._record_cache.clear()
+        ocr._pdf_file_keys.clear()
+
+
+def _make_pdf(text: str) -> str:
+    """Write a one-page PDF containing text and return its path"""
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_long_s_anchor():
+    """IGNORECASE matches 'ſ' as 's', so 'Conſumo' must still hit the usage pattern"""
+
+    record = DocumentParser.parse_iberdrola_pdf("iberdrola Conſumo total: 5 kWh", {})
+
+    print("✅ Test: Long s in anchor")
+    print(f"  usage_value -> {record.usage_value}")
+
+    assert record.usage_value == 5.0, "Usage value extraction failed"
+
+    print("✅ All assertions passed!")
+    return True
+
+
+def test_dotless_i_anchor():
+    """IGNORECASE matches 'ı' as 'i', so 'EMISıON' must still hit the issue date pattern"""
+
+    record = DocumentParser.parse_iberdrola_pdf("FECHA DE EMISıON: 02/06/2025", {})
+
+    print("✅ Test: Dotless i in anchor")
+    print(f"  issue_date -> {record.issue_date}")
+
+    assert record.issue_date is not None, "Issue date extraction failed"
+    assert record.issue_date.strftime("%Y-%m-%d") == "2025-06-02", "Issue date extraction failed"
+
+    print("✅ All assertions passed!")
+    return True
+
+
+def test_pdf_reupload_skips_extraction():
+    """A byte-identical PDF is served from the cache without extracting its text again"""
+
+    _clear_caches()
+    path = _make_pdf("Iberdrola Clientes\nConsumo total: 1.250,5 kWh\nFECHA DE EMISION: 02/06/2025")
+    original = DocumentParser.__dict__["extract_text_from_pdf"]
+    calls = []
+
+    def counting_extract(file_path):
+        calls.append(file_path)
+        return original.__func__(file_path)
+
+    DocumentParser.extract_text_from_pdf = staticmethod(counting_extract)
+    try:
+        first = DocumentParser.parse_pdf_invoice(path)
+        second = DocumentParser.parse_pdf_invoice(path)
+
+        print("✅ Test: PDF re-upload cache")
+        print(f"  extractions -> {len(calls)}")
+
+        assert len(calls) == 1, "Second parse extracted the text again"
+        assert second is not first, "Cache returned the same instance"
+        assert second.model_dump() == first.model_dump(), "Cached record differs from the parsed one"
+
+        # Mutating a returned record must not leak into the cache
+        second.meta["tampered"] = True
+        second.usage_value = -1.0
+        third = DocumentParser.parse_pdf_invoice(path)
+        assert len(calls) == 1, "Third parse extracted the text again"
+        assert "tampered" not in third.meta, "Cached meta was mutated through a returned copy"
+        assert third.usage_value == first.usage_value, "Cached record was mutated through a returned copy"
+    finally:
+        DocumentParser.extract_text_from_pdf = original
+        os.remove(path)
+        _clear_caches()
+
+    print("✅ All assertions passed!")
+    return True
+
+
+def test_record_cache_returns_copies():
+    """Records going into and out of the cache are copies, meta dict included"""
+
+    _clear_caches()
+    key = ("copyhash", "Iberdrola")
+    record = UploadRecord(supplier="Iberdrola", usage_value=10.0, meta={"pages": 1, "nested": {"a": 1}})
+    DocumentParser._cache_record(key, record)
+
+    # The caller keeps working on the record it just cached
+    record.meta["pages"] = 99
+
+    hit = DocumentParser._get_cached_record(key)
+    hit.usage_value = -1.0
+    hit.meta["tampered"] = True
+    hit.meta["nested"]["a"] = 2
+
+    again = DocumentParser._get_cached_record(key)
+
+    print("✅ Test: Record cache copies")
+    print(f"  later hit -> {again.usage_value}, {again.meta}")
+
+    assert again is not hit, "Cache returned the same instance twice"
+    assert again.usage_value == 10.0, "Cached record was mutated through a hit"
+    assert again.meta == {"pages": 1, "nested": {"a": 1}}, "Cached meta was mutated"
+    _clear_caches()
+
+    print("✅ All assertions passed!")
+    return True
+
+
+def test_record_cache_eviction():
+    """The cache holds at most _RECORD_CACHE_SIZE records and drops the least recently used"""
+
+    _clear_caches()
+    original_size = ocr._RECORD_CACHE_SIZE
+    ocr._RECORD_CACHE_SIZE = 3
+    try:
+        for i in range(3):
+            DocumentParser._cache_record((f"hash{i}", None), UploadRecord(usage_value=float(i)))
+
+        # Touch the oldest entry so the next insert evicts hash1 instead
+        assert DocumentParser._get_cached_record(("hash0", None)) is not None
+        DocumentParser._cache_record(("hash3", None), UploadRecord(usage_value=3.0))
+
+        print("✅ Test: Record cache eviction")
+        print(f"  keys -> {list(ocr._record_cache)}")
+
+        assert len(ocr._record_cache) == 3, "Cache grew past its size bound"
+        assert DocumentParser._get_cached_record(("hash1", None)) is None, "LRU entry was not evicted"
+        for name in ("hash0", "hash2", "hash3"):
+            assert DocumentParser._get_cached_record((name, None)) is not None, f"{name} was evicted"
+    finally:
+        ocr._RECORD_CACHE_SIZE = original_size
+        _clear_caches()
+
+    print("✅ All assertions passed!")
+    return True
+
+
+def test_txt_and_pdf_cache_keys_stay_apart():
+    """A TXT upload never picks up, or overwrites, a PDF record for the same text"""
+
+    _clear_caches()
+    text = "Iberdrola Clientes\nConsumo total: 1.250,5 kWh\n"
+    text_hash = hashlib.blake2b(text.encode(), digest_size=20).hexdigest()
+    for supplier in ("Iberdrola", None):
+        DocumentParser._cache_record((text_hash, supplier), UploadRecord(supplier=supplier, meta={"method": "pymupdf"}))
+
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    try:
+        txt_record = DocumentParser.parse_document(path, "txt")[0]
+        txt_again = DocumentParser.parse_document(path, "txt")[0]
+    finally:
+        os.remove(path)
+
+    print("✅ Test: TXT / PDF cache keys")
+    print(f"  txt meta -> {txt_record.meta}")
+
+    assert txt_record.meta.get("file_type") == "txt", "TXT upload got a PDF record from the cache"
+    assert txt_again.model_dump() == txt_record.model_dump(), "TXT re-upload missed its own cache entry"
+    for supplier in ("Iberdrola", None):
+        pdf_record = DocumentParser._get_cached_record((text_hash, supplier))
+        assert pdf_record.meta == {"method": "pymupdf"}, "TXT upload overwrote a PDF cache entry"
+    assert len(ocr._record_cache) == 3, "TXT and PDF entries share a key"
+    _clear_caches()
+
+    print("✅ All assertions passed!")
+    return True
+
+
+def _strptime_date(date_str: str):
+    """Reference: the plain strptime loop over the parser's formats"""
+    date_str = date_str.strip()
+    for fmt in ocr._DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def test_fixed_width_dates_match_strptime():
+    """The sliced DD/MM/YYYY and YYYY-MM-DD fast path agrees with strptime"""
+
+    cases = [
+        # Valid day-first and ISO dates
+        "02/06/2025", "02-06-2025", "02.06.2025", "2025-06-02", " 31/12/2024 ",
+        # Out-of-range day or month
+        "31/02/2025", "29/02/2023", "00/06/2025", "15/13/2025", "2025-02-30",
+        # Same width but not all digits, or mixed separators
+        "ab/cd/efgh", "12/ab/2025", "+1/06/2025", "02/06-2025", "2025/06/02", "１２/０６/２０２５",
+    ]
+
+    print("✅ Test: Fixed-width date parsing")
+    for date_str in cases:
+        parsed = DocumentParser.parse_spanish_date(date_str)
+        print(f"  {date_str!r} -> {parsed}")
+        assert parsed == _strptime_date(date_str), f"Failed for {date_str!r}"
+
+    assert DocumentParser.parse_spanish_date("02/06/2025") == datetime(2025, 6, 2), "Day-first order wrong"
+    assert DocumentParser.parse_spanish_date("31/02/2025") is None, "Invalid date accepted"
+
+    print("✅ All assertions passed!")
+    return True
+
+
+def test_date_cache_matches_uncached():
+    """The lru_cache on parse_spanish_date returns what the uncached parser returns"""
+
+    uncached = DocumentParser.parse_spanish_date.__wrapped__
+    DocumentParser.parse_spanish_date.cache_clear()
+    cases = ["02/06/2025", "02-06-2025", "31/02/2025", "ab/cd/efgh", "2025-06-02", "", None]
+
+    print("✅ Test: Cached date parsing")
+    for date_str in cases:
+        first = DocumentParser.parse_spanish_date(date_str)
+        second = DocumentParser.parse_spanish_date(date_str)
+        print(f"  {date_str!r} -> {first}")
+        assert first == uncached(date_str), f"Cached result differs for {date_str!r}"
+        assert second == first, f"Cache hit differs for {date_str!r}"
+
+    info = DocumentParser.parse_spanish_date.cache_info()
+    assert info.hits == len(cases), "Repeated dates were not served from the cache"
+
+    print("✅ All assertions passed!")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("🧪 DOCUMENT PARSER - UNIT TESTS")
+    print("=" * 50)
+    print()
+
+    try:
+        test_long_s_anchor()
+        test_dotless_i_anchor()
+        test_pdf_reupload_skips_extraction()
+        test_record_cache_returns_copies()
+        test_record_cache_eviction()
+        test_txt_and_pdf_cache_keys_stay_apart()
+        test_fixed_width_dates_match_strptime()
+        test_date_cache_matches_uncached()
+
+        print("=" * 50)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 50)
+
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,118 @@
+"""
+Test EmailService HTML rendering
+
+Renders each email with a stand-in Resend client, so nothing is sent.
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services import email as email_service
+from app.services.email import EmailService
+
+
+COMPANY = 'Acme <&"> Ltd'
+COMPANY_ESCAPED = "Acme &lt;&amp;&quot;&gt; Ltd"
+
+
+class _CapturingEmails:
+    """Records the payloads passed to Emails.send instead of posting them"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, payload):
+        self.sent.append(payload)
+        return {"id": "test"}
+
+
+class _FakeResend:
+    def __init__(self):
+        self.Emails = _CapturingEmails()
+
+
+def _render(send, *args, **kwargs):
+    """Call an EmailService method and return the payload it would have sent"""
+    original = email_service._resend
+    fake = _FakeResend()
+    email_service._resend = fake
+    try:
+        send(*args, **kwargs)
+    finally:
+        email_service._resend = original
+    return fake.Emails.sent[0]
+
+
+def test_company_name_is_escaped():
+    """Markup characters in the company name render as text in every email"""
+
+    payloads = {
+        "welcome": _render(EmailService.send_welcome_email, "a@acme.es", COMPANY),
+        "credentials": _render(
+            EmailService.send_credentials_email,
+            "a@acme.es", COMPANY, user_email="a@acme.es", password="pw", language="es"
+        ),
+        "report_ready": _render(
+            EmailService.send_report_ready_email,
+            "a@acme.es", COMPANY, report_url="https://getluma.es/r/1", coverage=80.0
+        ),
+    }
+
+    print("✅ Test: Company name escaping")
+    for name, payload in payloads.items():
+        html = payload["html"]
+        print(f"  {name} -> escaped: {COMPANY_ESCAPED in html}")
+        assert COMPANY_ESCAPED in html, f"Escaped company name missing from {name}"
+        assert COMPANY not in html, f"Raw company name leaked into {name}"
+
+    # The subject is plain text, so it keeps the name as typed
+    assert payloads["welcome"]["subject"].count(COMPANY) == 1, "Welcome subject lost the company name"
+
+    print("✅ All assertions passed!")
+    return True
+
+
+def test_credentials_and_url_are_escaped():
+    """Login email, password and report URL are escaped too"""
+
+    credentials = _render(
+        EmailService.send_credentials_email,
+        "a@acme.es", "Acme", user_email="<b>a@acme.es</b>", password='p<&">w'
+    )["html"]
+    report = _render(
+        EmailService.send_report_ready_email,
+        "a@acme.es", "Acme", report_url='https://getluma.es/r/1?a=1&b="2"', coverage=80.0
+    )["html"]
+
+    print("✅ Test: Credentials and URL escaping")
+
+    assert "&lt;b&gt;a@acme.es&lt;/b&gt;" in credentials, "User email not escaped"
+    assert "<b>a@acme.es</b>" not in credentials, "Raw user email leaked"
+    assert "p&lt;&amp;&quot;&gt;w" in credentials, "Password not escaped"
+    assert 'https://getluma.es/r/1?a=1&amp;b=&quot;2&quot;' in report, "Report URL not escaped"
+
+    print("✅ All assertions passed!")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("🧪 EMAIL TEMPLATES - UNIT TESTS")
+    print("=" * 50)
+    print()
+
+    try:
+        test_company_name_is_escaped()
+        test_credentials_and_url_are_escaped()
+
+        print("=" * 50)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 50)
+
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)